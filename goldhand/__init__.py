@@ -1,6 +1,15 @@
 from .tw import *
+from .cache import *
+from .providers import *
+from .indicators import *
+from .panel import *
+from .pipeline import *
+from .engine import *
+from .streaming import *
 from .stocks import *
 from .helpers import *
 from .backtest import *
+from .sweep import *
+from .portfolio import *
 from .strategy_rsi import *
 from .strategy_goldhand_line import *
\ No newline at end of file
@@ -3,6 +3,11 @@ import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
+from concurrent.futures import ProcessPoolExecutor
+from goldhand.engine import add_trade_context, signals_to_trades, trade_growth, trade_positions, uses_goldhand_line, with_goldhand_line
+
+# trades summary values reported for the test windows of the walk-forward analysis
+WALK_FORWARD_METRICS = ['number_of_trades', 'win_ratio(%)', 'average_res(%)', 'median_res(%)', 'cumulative_result', 'max_gain(%)', 'max_lost(%)', 'max_drawdown(%)', 'exposure(%)']
 
 class Backtest:
     def __init__(self, data, strategy_function, plot_title='', **kwargs):
@@ -11,7 +16,8 @@ class Backtest:
         
         Parameters:
         - data: pandas DataFrame with historical data
-        - strategy_function: function that takes in the data and returns a DataFrame of trades
+        - strategy_function: function that takes in the data and returns a DataFrame of trades,
+                             or the buy and sell signal arrays, e.g. rsi_signals
         - plot_title: title for the plot
         - kwargs: additional parameters to be passed to the strategy function
         """
@@ -20,6 +26,7 @@ class Backtest:
         self.strategy_function = strategy_function
         self.additional_params = kwargs
         self.add_trades()
+        self.add_equity()
         self.summary_of_trades()
 
 
@@ -28,6 +35,9 @@ class Backtest:
         Calculate the trades using the strategy function and the data provided
         """
         self.trades = self.strategy_function(self.data, **self.additional_params)
+        if isinstance(self.trades, tuple):
+            # signal strategy, e.g. rsi_signals
+            self.trades = signals_to_trades(self.data, *self.trades)
         self.trades['ticker'] = self.data['ticker'].iloc[0]
         
         # order columns
@@ -37,69 +47,101 @@ class Backtest:
         self.trades = self.trades[first]
 
 
+    def add_equity(self):
+        """
+        Calculate the daily equity curve of the trades valued at the close, its drawdown and the bars in position
+        """
+        dates = pd.DatetimeIndex(self.data['date'].values)
+        self.equity = pd.Series(np.cumprod(trade_growth(self.data, self.trades)), index=dates, name='equity')
+        self.drawdown = self.equity / self.equity.cummax() - 1
+        self.exposure = pd.Series(trade_positions(self.data, self.trades), index=dates, name='exposure')
+
+
+    def trades_context(self, columns=None):
+        """
+        The trades with the values of the data at their buy and sell bars, e.g. the rsi at the signals
+        Parameters:
+        - columns: list of str, columns of the data to join, default all of them
+        Return: pandas DataFrame of the trades with the buy_ and sell_ prefixed columns
+        """
+        return add_trade_context(self.trades, self.data, columns)
+
+
     def summary_of_trades(self):
         """
-        Calculate the summary of the trades
+        Calculate the summary of the trades, the statistics are numbers from one pass over the results
+        and the lists of the trade results are joined into text only when they are shown
         """
+        result = self.trades['result'].to_numpy(dtype=np.float64)
+        days = self.trades['days_in_trade'].to_numpy(dtype=np.float64)
+        win = result > 1
+        profitable = result[result >= 1]
+        looser = result[result < 1]
+
+        # the statistics of a backtest without trades are NaN
         self.trades_summary = {
           'ticker' : self.data['ticker'].iloc[0],
-          'number_of_trades' : self.trades.shape[0],
-          'win_ratio(%)' : round(((sum(self.trades['result'] >1) / self.trades.shape[0])*100),2),
-          'average_res(%)' : round(((self.trades['result'].mean()-1)*100),2),
-          'average_trade_len(days)' :  round(self.trades['days_in_trade'].mean(), 0),
-          
-          
-          'median_res(%)': round(((self.trades['result'].median()-1)*100),2),
-          'cumulative_result': f"{round(list(np.cumprod(self.trades['result'], axis=0))[-1], 2)} x",
-          'trade_results': ' # '.join([ str(round(((x-1)*100),2)) for x in self.trades['result']]),
+          'number_of_trades' : len(result),
+          'win_ratio(%)' : round(_stat(np.mean, win)*100, 2),
+          'average_res(%)' : _pct(_stat(np.mean, result)),
+          'average_trade_len(days)' : round(_stat(np.mean, days), 0),
 
-          'profitable_trade_results': ' # '.join([ str(round(((x-1)*100),2)) for x in self.trades['result'] if x>=1]),
+          'median_res(%)': _pct(_stat(np.median, result)),
+          'cumulative_result': round(_stat(np.prod, result), 2),
+          'trade_results': TradeResults(result),
 
-          'profitable_trades_mean' : round((( np.mean([x for x in self.trades['result'] if x>=1]) -1)*100),2),
-          'profitable_trades_median' : round((( np.median([x for x in self.trades['result'] if x>=1])-1)*100),2),
+          'profitable_trade_results': TradeResults(profitable),
+          'profitable_trades_mean' : _pct(_stat(np.mean, profitable)),
+          'profitable_trades_median' : _pct(_stat(np.median, profitable)),
 
-          'looser_trade_results': ' # '.join([ str(round(((x-1)*100),2)) for x in self.trades['result'] if x<1]),
+          'looser_trade_results': TradeResults(looser),
+          'looser_trades_mean' : _pct(_stat(np.mean, looser)),
+          'looser_trades_median' : _pct(_stat(np.median, looser)),
 
-          'looser_trades_mean' : round((( np.mean([x for x in self.trades['result'] if x<1])-1)*100),2),
-          'looser_trades_median' : round((( np.median([x for x in self.trades['result'] if x<1])-1)*100),2),
+          'median_trade_len(days)' : _stat(np.median, days),
 
-          'median_trade_len(days)' :  self.trades['days_in_trade'].median(),
+          'number_of_win_trades': int(win.sum()),
+          'number_of_lost_trades': int(len(result) - win.sum()),
 
+          'max_gain(%)' : _pct(_stat(np.max, result)),
+          'max_lost(%)' : _pct(_stat(np.min, result)),
 
-          'number_of_win_trades': sum(self.trades['result'] >1),
-          'number_of_lost_trades': (self.trades.shape[0] - sum(self.trades['result'] >1)),
+          'max_drawdown(%)' : round(self.drawdown.min()*100, 2),
+          'exposure(%)' : round(self.exposure.mean()*100, 2),
 
-          'max_gain(%)' : round(((self.trades['result'].max()-1)*100),2),
-          'max_lost(%)' : round(((self.trades['result'].min()-1)*100),2),
+          'first_trade_buy' : min(self.trades['buy_date']) if len(result) else np.nan,
 
-          'first_trade_buy' : min(self.trades['buy_date']),
-          
-          
           'first_data_date' : self.data['date'].iloc[0].strftime('%Y-%m-%d'),
           'first_open_price' : round(self.data['open'].iloc[0], 2),
-          
+
           'last_data_date' : self.data['date'].iloc[-1].strftime('%Y-%m-%d'),
           'last_close_price' :round(self.data['close'].iloc[-1], 2),
-          
-          'hold_result' : f"{round(self.data['close'].iloc[-1] / self.data['open'].iloc[0],2)} x",
+
+          'hold_result' : round(self.data['close'].iloc[-1] / self.data['open'].iloc[0], 2),
         }
         self.trades_summary.update(self.additional_params)
-        self.trade_summary_plot_text = f"Trades: { self.trades_summary['number_of_trades']}<br>"\
+
+
+    @property
+    def trade_summary_plot_text(self):
+        """
+        Summary of the trades for the plot annotations
+        """
+        return f"Trades: { self.trades_summary['number_of_trades']}<br>"\
         f"Win ratio: { self.trades_summary['win_ratio(%)']}%<br>"\
         f"Average result: { self.trades_summary['average_res(%)']}%<br>"\
         f"Median result: { self.trades_summary['median_res(%)']}%<br>"\
         f"Average trade length: { self.trades_summary['average_trade_len(days)']} days<br>"\
-        f"Cumulative result: { self.trades_summary['cumulative_result']}<br>"\
+        f"Cumulative result: { self.trades_summary['cumulative_result']} x<br>"\
+        f"Max drawdown: { self.trades_summary['max_drawdown(%)']}%<br>"\
         f"Profitable trades mean: { self.trades_summary['profitable_trades_mean']}%<br>"\
         f"Profitable trades median: { self.trades_summary['profitable_trades_median']}%<br>"\
         f"Looser trades mean: { self.trades_summary['looser_trades_mean']}%<br>"\
         f"Looser trades median: { self.trades_summary['looser_trades_median']}%<br>"\
-        f"Hold result: {self.trades_summary['hold_result'] }<br>"\
+        f"Hold result: {self.trades_summary['hold_result'] } x<br>"\
         f"First data date: { self.trades_summary['first_data_date']}<br>"\
         f"First open price: ${self.trades_summary['first_open_price']}<br>"
-            
 
-        
 
     def show_trades(self):
         """
@@ -157,6 +199,40 @@ class Backtest:
         return(fig)
 
 
+    def walk_forward(self, grid, train_size, test_size, step=None, metric='average_res(%)', max_workers=None):
+        """
+        Walk-forward analysis: choose the best parameters on a training window, test them on the next window, then slide forward.
+        The indicators of the data are computed once over the full history, the windows are row ranges of it
+        and they are evaluated in parallel.
+
+        Parameters:
+        - grid: dictionary of parameter name and list of values, e.g. {'buy_threshold': [20, 30], 'sell_threshold': [70, 80]}
+        - train_size: int, number of bars of the training windows
+        - test_size: int, number of bars of the test windows
+        - step: int, number of bars between the windows, default test_size
+        - metric: str, numeric value of the trades summary to maximise on the training window
+        - max_workers: int, number of processes, 1 runs in the current process
+        Return: pandas DataFrame, one row per window with the dates, the best parameters and the test results
+        """
+        from goldhand.sweep import parameter_grid
+        combinations = [{**self.additional_params, **x} for x in parameter_grid(grid)]
+        data = self.data
+        if uses_goldhand_line(self.strategy_function):
+            # the GoldHand line of the full history on a copy, the windows reuse it
+            data = with_goldhand_line(data)
+        step = test_size if step is None else step
+        starts = range(0, len(data) - train_size - test_size + 1, step)
+        windows = [data.iloc[x:x + train_size + test_size] for x in starts]
+
+        if max_workers == 1:
+            rows = [walk_forward_window(x, self.strategy_function, combinations, train_size, metric) for x in windows]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(walk_forward_window, x, self.strategy_function, combinations, train_size, metric) for x in windows]
+                rows = [x.result() for x in futures]
+        self.walk_forward_results = pd.DataFrame(rows)
+        return self.walk_forward_results
+
     def summarize_strategy(self):
         """
         Display the summary of the strategy:
@@ -167,3 +243,165 @@ class Backtest:
         display(pd.DataFrame(self.trades_summary, index=['Strategy summary']).T )
         self.show_trades().show()
         display(self.trades)
+
+
+def walk_forward_window(data, strategy_function, combinations, train_size, metric='average_res(%)'):
+    """
+    Evaluate one window of the walk-forward analysis
+    Parameters:
+    - data: pandas DataFrame, the training bars followed by the test bars
+    - strategy_function: strategy of the Backtest class
+    - combinations: list of dictionaries of the strategy parameters
+    - train_size: int, number of training bars at the start of data
+    - metric: str, numeric value of the trades summary to maximise on the training bars
+    Return: dictionary of the window dates, the best parameters, their training metric and the test results
+    """
+    train = data.iloc[:train_size].reset_index(drop=True)
+    test = data.iloc[train_size:].reset_index(drop=True)
+    row = {'train_start': train['date'].iloc[0], 'train_end': train['date'].iloc[-1],
+           'test_start': test['date'].iloc[0], 'test_end': test['date'].iloc[-1]}
+
+    best, best_value = None, None
+    for params in combinations:
+        value = Backtest(train, strategy_function, **params).trades_summary[metric]
+        # NaN without trades
+        if pd.notna(value) and (best_value is None or value > best_value):
+            best, best_value = params, value
+    if best is None:
+        return row
+
+    row.update(best)
+    row[f'train_{metric}'] = best_value
+    summary = Backtest(test, strategy_function, **best).trades_summary
+    row.update({f'test_{x}': summary[x] for x in WALK_FORWARD_METRICS})
+    return row
+
+
+def _pct(result):
+    return round((result - 1)*100, 2)
+
+
+def _stat(function, values):
+    return function(values) if len(values) else np.nan
+
+
+class TradeResults:
+    def __init__(self, results):
+        """
+        Results of trades shown as their % changes joined by ' # ', the text is built when it is shown
+
+        Parameters:
+        - results: numpy array of the trade results
+        """
+        self.results = results
+
+    def __str__(self):
+        return ' # '.join([str(_pct(x)) for x in self.results.tolist()])
+
+    __repr__ = __str__
+
+    def __eq__(self, other):
+        return str(self) == str(other)
+
+    # mutable like the results array, so not hashable
+    __hash__ = None
+
+    def __len__(self):
+        return len(self.results)
+
+
+def summarize_trades(trades, by='ticker'):
+    """
+    Summary of many trade tables at once in one groupby, e.g. the trades of a sweep or of a universe of tickers
+    Parameters:
+    - trades: pandas DataFrame of the trades with result, days_in_trade and buy_date columns
+    - by: str or list of str, columns of the groups, e.g. ['ticker', 'buy_threshold', 'sell_threshold']
+    Return: pandas DataFrame, one row of the numeric trades statistics per group
+    """
+    result = trades['result'].astype(np.float64)
+    by = [by] if isinstance(by, str) else list(by)
+    frame = trades[by].assign(
+        result=result,
+        win=result > 1,
+        profitable=result.where(result >= 1),
+        looser=result.where(result < 1),
+        days=trades['days_in_trade'].astype(np.float64),
+        buy_date=trades['buy_date'],
+    )
+    stats = frame.groupby(by, sort=False).agg(
+        number_of_trades=('result', 'size'),
+        win=('win', 'sum'),
+        average=('result', 'mean'),
+        median=('result', 'median'),
+        cumulative=('result', 'prod'),
+        profitable_mean=('profitable', 'mean'),
+        profitable_median=('profitable', 'median'),
+        looser_mean=('looser', 'mean'),
+        looser_median=('looser', 'median'),
+        average_len=('days', 'mean'),
+        median_len=('days', 'median'),
+        max=('result', 'max'),
+        min=('result', 'min'),
+        first_trade_buy=('buy_date', 'min'),
+    )
+    summary = pd.DataFrame({
+        'number_of_trades': stats['number_of_trades'],
+        'win_ratio(%)': (stats['win'] / stats['number_of_trades']*100).round(2),
+        'average_res(%)': ((stats['average'] - 1)*100).round(2),
+        'average_trade_len(days)': stats['average_len'].round(0),
+        'median_res(%)': ((stats['median'] - 1)*100).round(2),
+        'cumulative_result': stats['cumulative'].round(2),
+        'profitable_trades_mean': ((stats['profitable_mean'] - 1)*100).round(2),
+        'profitable_trades_median': ((stats['profitable_median'] - 1)*100).round(2),
+        'looser_trades_mean': ((stats['looser_mean'] - 1)*100).round(2),
+        'looser_trades_median': ((stats['looser_median'] - 1)*100).round(2),
+        'median_trade_len(days)': stats['median_len'],
+        'number_of_win_trades': stats['win'].astype(int),
+        'number_of_lost_trades': (stats['number_of_trades'] - stats['win']).astype(int),
+        'max_gain(%)': ((stats['max'] - 1)*100).round(2),
+        'max_lost(%)': ((stats['min'] - 1)*100).round(2),
+        'first_trade_buy': stats['first_trade_buy'],
+    })
+    return summary.reset_index()
+
+
+def backtest_strategies(data, strategies, use_numba=None):
+    """
+    Backtest many strategies, or variants of one, on the same data in one pass: the trades of all of them are built
+    from the stacked signal arrays into one table and summarized in one groupby
+    Parameters:
+    - data: pandas DataFrame with the indicators, e.g. GoldHand(ticker).df
+    - strategies: list of (strategy, params) tuples, the strategy is a signal function returning the buy and sell arrays,
+                  e.g. rsi_signals, or a strategy with a signals attribute, e.g. rsi_strategy
+    - use_numba: bool, see signal_pairs
+    Return: tuple of (pandas DataFrame, one row of the summary per strategy, pandas DataFrame of the trades with a strategy column)
+    """
+    if any(uses_goldhand_line(function) for function, params in strategies):
+        # the line is computed once for all the strategies and the data of the caller is not changed
+        data = with_goldhand_line(data)
+    signals = [getattr(function, 'signals', function)(data, **params) for function, params in strategies]
+    buy = np.column_stack([x[0] for x in signals])
+    sell = np.column_stack([x[1] for x in signals])
+    trades = signals_to_trades(data, buy, sell, use_numba)
+    trades.insert(0, 'ticker', data['ticker'].iloc[0])
+
+    stats = summarize_trades(trades, by='strategy').set_index('strategy').reindex(range(len(strategies)))
+    for column in ['number_of_trades', 'number_of_win_trades', 'number_of_lost_trades']:
+        stats[column] = stats[column].fillna(0).astype(int)
+    groups = trades.groupby('strategy').indices
+    fills = trades[['buy_bar', 'sell_bar', 'buy_price', 'sell_price']]
+    drawdown, exposure = [], []
+    for i in range(len(strategies)):
+        strategy_trades = fills.iloc[groups.get(i, [])]
+        equity = np.cumprod(trade_growth(data, strategy_trades))
+        drawdown.append(round((equity / np.maximum.accumulate(equity) - 1).min()*100, 2))
+        exposure.append(round(trade_positions(data, strategy_trades).mean()*100, 2))
+    stats['max_drawdown(%)'] = drawdown
+    stats['exposure(%)'] = exposure
+
+    summary = pd.DataFrame({
+        'ticker': data['ticker'].iloc[0],
+        'strategy': [getattr(function, '__name__', str(function)) for function, params in strategies],
+    })
+    summary = pd.concat([summary, stats.reset_index(drop=True), pd.DataFrame([params for function, params in strategies])], axis=1)
+    return summary, trades
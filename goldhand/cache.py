@@ -0,0 +1,140 @@
+import os
+import re
+from datetime import datetime, timedelta
+import pandas as pd
+
+
+class PriceCache:
+    def __init__(self, directory='~/.goldhand/cache', max_age=timedelta(hours=12), overlap=5, tolerance=1e-6):
+        """
+        On-disk Parquet cache of OHLCV data, one file per ticker, period and interval.
+        A repeat load only downloads the bars after the last cached date.
+
+        Parameters:
+        - directory: str, folder of the cache files
+        - max_age: timedelta, cached data younger than this is returned without any download, None to always top up
+        - overlap: int, number of already cached bars before the last one downloaded again to detect split/dividend adjustments
+        - tolerance: float, relative close price difference on the overlapping bars that invalidates the cache
+
+        Writing Parquet files requires pyarrow (or fastparquet).
+        """
+        self.directory = os.path.expanduser(directory)
+        self.max_age = max_age
+        self.overlap = overlap
+        self.tolerance = tolerance
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, ticker, period='max', interval='1d', auto_adjust=True):
+        """
+        Path of the cache file of a ticker
+        Parameters:
+        - ticker: str, ticker symbol
+        - period: str, data period (e.g. '18y', 'max')
+        - interval: str, data interval (e.g. '1d', '1h')
+        - auto_adjust: bool, adjusted or raw prices
+        Return: str, file path
+        """
+        name = f"{ticker}_{period}_{interval}" + ('' if auto_adjust else '_raw')
+        name = re.sub(r'[^\w\-\^=.]', '_', name)
+        return os.path.join(self.directory, f"{name}.parquet")
+
+    def is_fresh(self, path):
+        """
+        Check if a cache file is younger than max_age
+        Parameters:
+        - path: str, path of the cache file
+        Return: bool
+        """
+        if self.max_age is None or not os.path.exists(path):
+            return False
+        age = datetime.now() - datetime.fromtimestamp(os.path.getmtime(path))
+        return age < self.max_age
+
+    def invalidate(self, ticker=None):
+        """
+        Delete cached files, for example after a split or dividend adjustment
+        Parameters:
+        - ticker: str, delete only the files of this ticker, None to clear the whole cache
+        """
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith('.parquet'):
+                continue
+            if ticker is None or file_name.startswith(f"{ticker}_"):
+                os.remove(os.path.join(self.directory, file_name))
+
+    @staticmethod
+    def period_start(period, end=None):
+        """
+        First date covered by a yfinance period string
+        Parameters:
+        - period: str, e.g. '18y', '6mo', '5d', 'ytd', 'max'
+        - end: date, last date of the period, default today
+        Return: pd.Timestamp or None for 'max'
+        """
+        today = pd.Timestamp.today().normalize() if end is None else pd.Timestamp(end).normalize()
+        if period == 'ytd':
+            return today.replace(month=1, day=1)
+        match = re.fullmatch(r'(\d+)(y|mo|wk|d)', str(period))
+        if match is None:
+            return None
+        n, unit = int(match.group(1)), match.group(2)
+        offsets = {'y': pd.DateOffset(years=n), 'mo': pd.DateOffset(months=n), 'wk': pd.DateOffset(weeks=n), 'd': pd.DateOffset(days=n)}
+        return today - offsets[unit]
+
+    def load(self, ticker, period='max', interval='1d', auto_adjust=True, download=None):
+        """
+        Load the data of a ticker from the cache and download only the missing bars
+        Parameters:
+        - ticker: str, ticker symbol
+        - period: str, data period (e.g. '18y', 'max')
+        - interval: str, data interval (e.g. '1d', '1h')
+        - auto_adjust: bool, adjusted or raw prices
+        - download: function with the signature of GoldHand.download
+        Return: pd.DataFrame with columns ['date', 'open', 'high', 'low', 'close', 'volume', 'ticker']
+        """
+        if download is None:
+            from goldhand.stocks import GoldHand
+            download = GoldHand.download
+
+        path = self.path(ticker, period, interval, auto_adjust)
+        if not os.path.exists(path):
+            df = download(ticker, period=period, interval=interval, auto_adjust=auto_adjust)
+            return self._save(df, path, period)
+
+        cached = pd.read_parquet(path)
+        # files written by earlier versions have datetime.date objects
+        cached['date'] = pd.to_datetime(cached['date'])
+        if self.is_fresh(path):
+            return cached
+
+        # top up from a few bars before the last cached one
+        overlap_start = cached['date'].iloc[-min(self.overlap + 1, len(cached))]
+        new = download(ticker, period=period, interval=interval, auto_adjust=auto_adjust, start=overlap_start)
+        if new.empty:
+            os.utime(path)
+            return cached
+
+        # the last cached bar may be saved mid-session, it is always replaced and only the settled bars are compared
+        last_date = cached['date'].iloc[-1]
+        settled = cached[(cached['date'] >= overlap_start) & (cached['date'] < last_date)]
+        common = settled.merge(new[['date', 'close']], on='date', suffixes=('', '_new'))
+        changed = (common['close'] / common['close_new'] - 1).abs() > self.tolerance
+        if (common.empty and not settled.empty) or changed.any():
+            # prices were adjusted (split or dividend) since the last download
+            df = download(ticker, period=period, interval=interval, auto_adjust=auto_adjust)
+        else:
+            df = pd.concat([cached[cached['date'] < new['date'].iloc[0]], new], ignore_index=True)
+        return self._save(df, path, period)
+
+    def _save(self, df, path, period):
+        """
+        Trim the data to the requested period and write it to the cache
+        """
+        if df.empty:
+            return df
+        start = self.period_start(period)
+        if start is not None:
+            df = df[pd.to_datetime(df['date']) >= start]
+        df = df.reset_index(drop=True)
+        df.to_parquet(path, index=False)
+        return df
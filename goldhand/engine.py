@@ -0,0 +1,248 @@
+import numpy as np
+import pandas as pd
+from goldhand.indicators import add_goldhand_line, njit, NUMBA_AVAILABLE
+
+
+def next_true(mask):
+    """
+    Position of the next True value from every position
+    Parameters:
+    - mask: numpy bool array
+    Return: numpy int array of length len(mask)+1, len(mask) where there is no True value after
+    """
+    n = len(mask)
+    positions = np.where(mask, np.arange(n), n)
+    return np.append(np.minimum.accumulate(positions[::-1])[::-1], n)
+
+
+@njit(cache=True)
+def _signal_pairs_kernel(buy, sell):
+    n = buy.shape[0]
+    entries = np.empty(n, dtype=np.int64)
+    exits = np.empty(n, dtype=np.int64)
+    k = 0
+    in_trade = False
+    for i in range(1, n):
+        if not in_trade:
+            if buy[i]:
+                entries[k] = i
+                in_trade = True
+        elif sell[i]:
+            exits[k] = i
+            k += 1
+            in_trade = False
+    if in_trade:
+        exits[k] = n
+        k += 1
+    return entries[:k], exits[:k]
+
+
+def signal_pairs(buy, sell, use_numba=None):
+    """
+    Entry and exit signal bars of the trades: a trade starts at the first buy signal when not in a trade
+    and ends at the first sell signal after it. Signals on the first bar are not used.
+    Parameters:
+    - buy: numpy bool array, buy signals
+    - sell: numpy bool array, sell signals
+    - use_numba: bool, run the compiled state machine, default when numba is installed.
+                 False uses next signal lookups in numpy, which stay fast without numba.
+    Return: tuple of numpy int arrays, (entries, exits), the exit is len(buy) for a still open trade
+    """
+    buy = np.asarray(buy, dtype=bool)
+    sell = np.asarray(sell, dtype=bool)
+    if use_numba is None:
+        use_numba = NUMBA_AVAILABLE
+    if use_numba:
+        return _signal_pairs_kernel(buy, sell)
+
+    n = len(buy)
+    next_buy = next_true(buy)
+    next_sell = next_true(sell)
+    entries, exits = [], []
+    entry = next_buy[min(1, n)]
+    while entry < n:
+        exit = next_sell[entry + 1]
+        entries.append(entry)
+        exits.append(exit)
+        if exit >= n:
+            break
+        entry = next_buy[exit + 1]
+    return np.array(entries, dtype=np.int64), np.array(exits, dtype=np.int64)
+
+
+def _days(sell_dates, buy_dates):
+    return (pd.to_datetime(sell_dates) - pd.to_datetime(buy_dates)).dt.days.values
+
+
+def signals_to_trades(data, buy, sell, use_numba=None, context=False):
+    """
+    Build the trades from buy and sell signal arrays, the same trades as the loop strategies.
+    The trades are filled at the open of the bar after the signal, or at the close when the signal is on the last bar.
+    A trade without a sell signal is closed at the last close with status 'open'.
+    Parameters:
+    - data: pandas DataFrame with columns: date, open, high, low, close
+    - buy: numpy bool array, buy signals, or 2 dimensional with one column per strategy to build the trades of many strategies at once
+    - sell: numpy bool array, sell signals, the same shape as buy
+    - use_numba: bool, see signal_pairs
+    - context: bool, join all the columns of the buy and sell bars, see add_trade_context
+    Return: pandas DataFrame of the trades with the prices, dates and positions (buy_bar, sell_bar) of the filled bars,
+            with a strategy column of the signal columns for 2 dimensional signals
+    """
+    n = len(data)
+    columns = ['result', 'buy_price', 'sell_price', 'buy_date', 'sell_date', 'days_in_trade', 'buy_bar', 'sell_bar', 'trade_id', 'status']
+    buy = np.asarray(buy, dtype=bool)
+    sell = np.asarray(sell, dtype=bool)
+    if buy.ndim == 2:
+        pairs = [signal_pairs(np.ascontiguousarray(buy[:, i]), np.ascontiguousarray(sell[:, i]), use_numba) for i in range(buy.shape[1])]
+        counts = np.array([len(x[0]) for x in pairs], dtype=np.int64)
+        strategy = np.repeat(np.arange(len(pairs)), counts)
+        entries = np.concatenate([x[0] for x in pairs] + [np.empty(0, dtype=np.int64)])
+        exits = np.concatenate([x[1] for x in pairs] + [np.empty(0, dtype=np.int64)])
+        trade_id = np.arange(len(entries)) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+        columns = ['strategy'] + columns
+    else:
+        entries, exits = signal_pairs(buy, sell, use_numba)
+        trade_id = np.arange(1, len(entries) + 1)
+    if len(entries) == 0:
+        return pd.DataFrame(columns=columns)
+
+    opens, closes = data['open'].values, data['close'].values
+    closed = exits < n
+    # the fill bar of a still open trade is the last bar, it is valued at the last close
+    buy_bar = np.where(entries < n - 1, entries + 1, entries)
+    sell_bar = np.where(exits < n - 1, exits + 1, n - 1)
+    trades = pd.DataFrame({
+        'buy_price': np.where(entries < n - 1, opens[buy_bar], closes[entries]),
+        'sell_price': np.where(exits < n - 1, opens[sell_bar], closes[sell_bar]),
+        'buy_date': data['date'].iloc[buy_bar].values,
+        'sell_date': data['date'].iloc[sell_bar].values,
+        'buy_bar': buy_bar,
+        'sell_bar': sell_bar,
+        'trade_id': trade_id,
+        'status': np.where(closed, 'closed', 'open'),
+    })
+    if buy.ndim == 2:
+        trades['strategy'] = strategy
+    trades['result'] = trades['sell_price'] / trades['buy_price']
+    trades['days_in_trade'] = _days(trades['sell_date'], trades['buy_date'])
+    trades = trades[columns]
+    return add_trade_context(trades, data) if context else trades
+
+
+def add_trade_context(trades, data, columns=None):
+    """
+    Join the values of the buy and sell bars to the trades, e.g. the indicators at the signals
+    Parameters:
+    - trades: pandas DataFrame of the trades with buy_bar, sell_bar and status columns, see signals_to_trades
+    - data: pandas DataFrame the trades were built from
+    - columns: list of str, columns of data to join, default all of them
+    Return: pandas DataFrame of the trades with the buy_ and sell_ prefixed columns,
+            the sell_ values of a still open trade are empty
+    """
+    columns = [x for x in (data.columns if columns is None else columns) if f'buy_{x}' not in trades.columns]
+    trades = trades.reset_index(drop=True)
+    buys = data[columns].iloc[trades['buy_bar'].values.astype(np.int64)].add_prefix('buy_').reset_index(drop=True)
+    sells = data[columns].iloc[trades['sell_bar'].values.astype(np.int64)].add_prefix('sell_').reset_index(drop=True)
+    sells = sells.where(trades['status'] == 'closed', axis=0)
+    return pd.concat([trades, buys, sells], axis=1)
+
+
+def _trade_bars(data, trades):
+    if 'buy_bar' in trades.columns:
+        return trades['buy_bar'].values.astype(np.int64), trades['sell_bar'].values.astype(np.int64)
+    dates = pd.to_datetime(data['date']).values
+    buys = np.searchsorted(dates, pd.to_datetime(trades['buy_date']).values)
+    sells = np.searchsorted(dates, pd.to_datetime(trades['sell_date']).values)
+    return buys, sells
+
+
+def trade_positions(data, trades):
+    """
+    Bars with an open position, from the buy bar to the sell bar
+    Parameters:
+    - data: pandas DataFrame with a date column, sorted by date
+    - trades: pandas DataFrame of the trades with buy_bar and sell_bar, or buy_date and sell_date columns
+    Return: numpy bool array
+    """
+    position = np.zeros(len(data) + 1)
+    if len(trades):
+        buys, sells = _trade_bars(data, trades)
+        np.add.at(position, buys, 1)
+        np.add.at(position, sells + 1, -1)
+    return np.cumsum(position)[:-1] > 0
+
+
+def trade_growth(data, trades):
+    """
+    Growth of one unit of capital on every bar when trading the trades: the positions are valued at the close,
+    the first bar from the buy price and the last bar to the sell price, so a trade multiplies the capital by its result.
+    Parameters:
+    - data: pandas DataFrame with date and close columns, sorted by date
+    - trades: pandas DataFrame of the trades with buy_price, sell_price and the bars or dates, see trade_positions
+    Return: numpy array, 1 on the bars without position
+    """
+    close = data['close'].values.astype(np.float64)
+    growth = np.ones(len(data))
+    if len(trades) == 0:
+        return growth
+    buys, sells = _trade_bars(data, trades)
+    buy_price = trades['buy_price'].values.astype(np.float64)
+    sell_price = trades['sell_price'].values.astype(np.float64)
+
+    # bars strictly between the buy and the sell are held from close to close
+    held = np.zeros(len(data) + 1)
+    np.add.at(held, buys + 1, 1)
+    np.add.at(held, np.maximum(sells, buys + 1), -1)
+    held = np.cumsum(held)[:-1] > 0
+    growth[1:] = np.where(held[1:], close[1:] / close[:-1], 1.0)
+
+    same_bar = sells == buys
+    growth[buys] = np.where(same_bar, sell_price / buy_price, close[buys] / buy_price)
+    growth[sells[~same_bar]] = sell_price[~same_bar] / close[sells[~same_bar] - 1]
+    return growth
+
+
+def rsi_signals(data, buy_threshold=30, sell_threshold=70):
+    """
+    Signals of the RSI strategy
+    Parameters:
+    - data: pandas DataFrame with an rsi column
+    - buy_threshold: int, buy when RSI is below this value
+    - sell_threshold: int, sell when RSI is above this value
+    Return: tuple of numpy bool arrays, (buy, sell)
+    """
+    rsi = data['rsi'].values
+    return rsi < buy_threshold, rsi > sell_threshold
+
+
+def goldhand_line_signals(data, buy_at='gold', sell_at='grey'):
+    """
+    Signals of the GoldHand line strategy
+    Parameters:
+    - data: pandas DataFrame, the GoldHand line is computed when it has no color column, the data is not changed
+    - buy_at: str, the color of the line to buy at
+    - sell_at: str, the color of the line to sell at
+    Return: tuple of numpy bool arrays, (buy, sell)
+    """
+    color = with_goldhand_line(data)['color'].values
+    return color == buy_at, color == sell_at
+
+
+def with_goldhand_line(data):
+    """
+    The data with the GoldHand line, computed on a copy when it has no color column
+    Parameters:
+    - data: pandas DataFrame with high and low columns
+    Return: pandas DataFrame, data itself when it already has the line
+    """
+    return data if 'color' in data.columns else add_goldhand_line(data.copy())
+
+
+def uses_goldhand_line(strategy_function):
+    """
+    Whether a strategy trades on the GoldHand line, e.g. goldhand_line_strategy or goldhand_line_signals
+    Parameters:
+    - strategy_function: strategy of the Backtest class or signal function
+    Return: bool
+    """
+    return getattr(strategy_function, 'signals', strategy_function) is goldhand_line_signals
@@ -2,11 +2,48 @@ from datetime import datetime, timedelta
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
-from scipy.signal import argrelextrema
 import numpy as np
 import requests
 import json
 import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
+from goldhand.indicators import local_extrema, local_texts
+from goldhand.pipeline import olhc_pipeline
+from goldhand.providers import convert_dates
+
+def format_download(df, ticker):
+    """
+    Format a yfinance DataFrame of one ticker to the goldhand schema.
+
+    Parameters:
+    - df: pd.DataFrame, yfinance data of one ticker with the date in the index
+    - ticker: str, symbol added as ticker column
+
+    Returns:
+    - pd.DataFrame with lowercase columns ['date', 'open', 'high', 'low', 'close', 'volume', 'ticker']
+    """
+    # Clean up DataFrame
+    df = df.reset_index()
+    df.columns = df.columns.str.lower()
+
+    # Rename 'Date'/'Datetime' to 'date' consistently
+    if 'date' not in df.columns:
+        if 'datetime' in df.columns:
+            df.rename(columns={'datetime': 'date'}, inplace=True)
+
+    # Ensure 'date' column is datetime64
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'])
+
+    # Add ticker column
+    df['ticker'] = ticker
+
+    # Select relevant columns
+    cols = ['date', 'open', 'high', 'low', 'close', 'volume', 'ticker']
+    df = df[[c for c in cols if c in df.columns]]
+
+    return df
+
 
 def download(ticker: str, period: str = 'max', interval: str = '1d', auto_adjust: bool = True) -> pd.DataFrame:
         """
@@ -29,140 +66,99 @@ def download(ticker: str, period: str = 'max', interval: str = '1d', auto_adjust
                 print(f"Warning: No data found for ticker {ticker}")
                 return pd.DataFrame()
 
-            # Clean up DataFrame
-            df.reset_index(inplace=True)
-            df.columns = df.columns.str.lower()
-            
-            # Rename 'Date'/'Datetime' to 'date' consistently
-            if 'date' not in df.columns:
-                if 'datetime' in df.columns:
-                    df.rename(columns={'datetime': 'date'}, inplace=True)
-            
-            # Ensure 'date' column is datetime.date objects for compatibility with existing logic
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date']).dt.date
-
-            # Add ticker column
-            df['ticker'] = ticker
-            
-            # Select relevant columns
-            cols = ['date', 'open', 'high', 'low', 'close', 'volume', 'ticker']
-            df = df[[c for c in cols if c in df.columns]]
-            
-            return df
+            return format_download(df, ticker)
             
         except Exception as e:
             print(f"Error downloading data for {ticker}: {e}")
             return pd.DataFrame()
 
 
+def download_batch(tickers, period: str = 'max', interval: str = '1d', auto_adjust: bool = True) -> pd.DataFrame:
+    """
+    Download historical data for a list of tickers in one yfinance request.
 
-def get_olhc_data(ticker):
-    df = download(ticker)
+    Parameters:
+    - tickers: list of str, symbols (e.g., ['AAPL', 'BTC-USD'])
+    - period: str, data period to download (e.g. '1y', '2y', 'max')
+    - interval: str, data interval (e.g. '1d', '1h')
+
+    Returns:
+    - pd.DataFrame in long format with columns ['date', 'open', 'high', 'low', 'close', 'volume', 'ticker']
+    """
+    try:
+        df = yf.download(list(tickers), period=period, interval=interval, auto_adjust=auto_adjust, group_by='ticker', progress=False)
+        if df.empty:
+            print(f"Warning: No data found for tickers {', '.join(tickers)}")
+            return pd.DataFrame()
+
+        frames = []
+        found = df.columns.get_level_values(0)
+        for ticker in tickers:
+            if ticker not in found:
+                print(f"Warning: No data found for ticker {ticker}")
+                continue
+            # the tickers share one date index, drop the days without trading
+            tdf = format_download(df[ticker].dropna(subset=['Close']), ticker)
+            frames.append(tdf)
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    except Exception as e:
+        print(f"Error downloading data for {', '.join(tickers)}: {e}")
+        return pd.DataFrame()
+
+
+def download_many(tickers, period: str = 'max', interval: str = '1d', auto_adjust: bool = True, batch_size: int = 100, max_workers: int = 4) -> pd.DataFrame:
+    """
+    Download historical data for many tickers in batches using a thread pool.
+
+    Parameters:
+    - tickers: list of str, symbols (e.g., list(Tw().stock['name']))
+    - period: str, data period to download (e.g. '1y', '2y', 'max')
+    - interval: str, data interval (e.g. '1d', '1h')
+    - batch_size: int, number of tickers in one yfinance request
+    - max_workers: int, number of batches downloaded at the same time
+
+    Returns:
+    - pd.DataFrame in long format with columns ['date', 'open', 'high', 'low', 'close', 'volume', 'ticker']
+    """
+    tickers = list(dict.fromkeys(tickers))
+    batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        frames = list(pool.map(lambda batch: download_batch(batch, period=period, interval=interval, auto_adjust=auto_adjust), batches))
+
+    frames = [x for x in frames if not x.empty]
+    if not frames:
+        return pd.DataFrame(columns=['date', 'open', 'high', 'low', 'close', 'volume', 'ticker'])
+    return pd.concat(frames, ignore_index=True)
+
+
+
+def get_olhc_data(ticker, provider=None, date_type='datetime64'):
+    df = download(ticker) if provider is None else provider.download(ticker)
     df.columns = df.columns.str.lower()
-    df['date']= [x.date() for x in df['date']]
-
-    # ===== RSI (14, Wilder smoothing) =====
-    delta = df['close'].diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-    win = 14
-    avg_gain = gain.ewm(alpha=1/win, min_periods=win).mean()
-    avg_loss = loss.ewm(alpha=1/win, min_periods=win).mean()
-    rs = avg_gain / avg_loss
-    df['rsi'] = 100 - (100 / (1 + rs))
-
-    # ===== SMAS =====
-    df['sma_50']  = df['close'].rolling(50).mean()
-    df['diff_sma50']  = (df['close']/df['sma_50']  -1)*100
-
-    df['sma_100'] = df['close'].rolling(100).mean()
-    df['diff_sma100'] = (df['close']/df['sma_100'] -1)*100
-
-    df['sma_200'] = df['close'].rolling(200).mean()
-    df['diff_sma200'] = (df['close']/df['sma_200'] -1)*100
-
-    # ===== Bollinger Bands (20, 2) =====
-    mid = df['close'].rolling(20).mean()
-    std = df['close'].rolling(20).std()
-    df['bb_mid']   = mid
-    df['bb_upper'] = mid + 2*std
-    df['bb_lower'] = mid - 2*std
-
-    df['diff_upper_bb'] = (df['bb_upper']/df['close'] -1)*100
-    df['diff_lower_bb'] = (df['bb_lower']/df['close'] -1)*100
+    df['date'] = convert_dates(df['date'], date_type)
 
+    # RSI (14, Wilder smoothing), SMAs and Bollinger Bands (20, 2)
+    olhc_pipeline().run(df)
     return df
 
 
 
 def add_locals_to_olhc(df):
     #local min maxs
-    df['local'] = ''
-    df['local_text'] = ''
-    max_ids = list(argrelextrema(df['high'].values, np.greater, order=30)[0])
-    min_ids = list(argrelextrema(df['low'].values, np.less, order=30)[0])
-    df.loc[min_ids, 'local'] = 'minimum'
-    df.loc[max_ids, 'local'] = 'maximum'
-
-
-    states = df[df['local']!='']['local'].index.to_list()
-    problem = []
-    problem_list = []
-    for i in range(0, (len(states)-1) ):
-
-        if (df.loc[states[i], 'local'] != df.loc[states[i+1], 'local']):
-            if (len(problem)==0):
-                continue
-            else:
-                problem.append(states[i])
-                text = df.loc[states[i], 'local']
-                if(text=='minimum'):
-                    real_min = df.loc[problem, 'low'].idxmin()
-                    problem.remove(real_min)
-                    df.loc[problem, 'local']=''
-                else:
-                    real_max = df.loc[problem, 'high'].idxmax()
-                    problem.remove(real_max)
-                    df.loc[problem, 'local']=''
-
-                problem = []
-        else:
-            problem.append(states[i])
-
-    states = df[df['local']!='']['local'].index.to_list()
-
-    # if first is min ad the price
-    if df.loc[states[0], 'local']== 'minimum':
-        df.loc[states[0],'local_text'] = f"${round(df.loc[states[0], 'low'], 2)}"
-    else:
-        df.loc[states[0],'local_text'] = f"${round(df.loc[states[0], 'high'], 2)}"
+    high, low = df['high'].values, df['low'].values
+    kind = local_extrema(high, low, order=30)
+    states = np.flatnonzero(kind)
+    first = states[0]
 
     # add last fall if last local is max
-    if list(df[df['local']!='']['local'])[-1]=='maximum':
-        last_min_id = df.loc[df['low']==min(df['low'][-3:] )].index.to_list()[0]
-        df.loc[last_min_id , 'local'] = 'minimum'
-
-    states = df[df['local']!='']['local'].index.to_list()
-
-
-    for i in range(1,len(states)):
-        prev = df.loc[states[i-1], 'local']
-        current= df.loc[states[i], 'local']
-        prev_high = df.loc[states[i-1], 'high']
-        prev_low = df.loc[states[i-1], 'low']
-        current_high = df.loc[states[i], 'high']
-        current_low = df.loc[states[i], 'low']
-        if current == 'maximum':
-            # rise
-            rise = (current_high/ prev_low -1)*100
-            if rise>100:
-                df.loc[states[i], 'local_text'] = f'🚀🌌{round(((rise+100)/100), 2)}x<br>${round(current_high, 2)}'
-            else:
-                df.loc[states[i], 'local_text'] = f'🚀{round(rise, 2)}%<br>${round(current_high, 2)}'
-        else:
-            fall = round((1-(current_low / prev_high))*100, 2)
-            df.loc[states[i], 'local_text'] = f'🔻{fall}%<br>${round(current_low, 2)}'
+    if kind[states[-1]] == 1:
+        last_min_id = np.flatnonzero(low == min(low[-3:]))[0]
+        kind[last_min_id] = -1
+
+    df['local'] = np.select([kind == 1, kind == -1], ['maximum', 'minimum'], '').astype(object)
+    df['local_text'] = local_texts(kind, high, low, first=first, fall_icon='🔻', crash_icon='🔻')
     return(df)
 
 def plotly_with_locals(tdf,plot_title, plot_height=900):
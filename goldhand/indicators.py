@@ -0,0 +1,149 @@
+import numpy as np
+from scipy.signal import argrelextrema
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # numba is optional at runtime, the kernels run as plain python without it
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda function: function
+
+
+@njit(cache=True)
+def _smma_kernel(values, windows):
+    n = values.shape[0]
+    out = np.empty((n, windows.shape[0]))
+    if n == 0:
+        return out
+    for j in range(windows.shape[0]):
+        out[0, j] = values[0]
+    for i in range(1, n):
+        for j in range(windows.shape[0]):
+            out[i, j] = (out[i - 1, j] * (windows[j] - 1) + values[i]) / windows[j]
+    return out
+
+
+def smma_multi(values, windows):
+    """
+    Calculate Smoothed Simple Moving Averages (SMMA) of several windows in one pass
+    Parameters:
+    - values: array like, input series, e.g. hl2
+    - windows: list of int, window sizes
+
+    Return: numpy array with one column per window
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return _smma_kernel(values, np.asarray(windows, dtype=np.int64))
+
+
+def smma(values, window):
+    """
+    Calculate Smoothed Simple Moving Average (SMMA)
+    Parameters:
+    - values: array like, input series, e.g. hl2
+    - window: int, window size
+
+    Return: numpy array
+    """
+    return smma_multi(values, [window])[:, 0]
+
+
+def add_goldhand_line(data, windows=(15, 19, 25, 29)):
+    """
+    Add the GoldHand line to the data: hl2, the v1-v4 SMMA lines and the color of the line
+    Parameters:
+    - data: Pandas DataFrame with high and low columns
+    - windows: tuple of 4 int, SMMA windows of v1, v2, v3 and v4
+
+    Return: DataFrame with added hl2, v1, v2, v3, v4 and color columns
+    """
+    data['hl2'] = (data['high'] + data['low'])/2
+    lines = smma_multi(data['hl2'].values, windows)
+    for i, colname in enumerate(['v1', 'v2', 'v3', 'v4']):
+        data[colname] = lines[:, i]
+
+    v1, v2, v3, v4 = lines.T
+    gold = (v4 < v3) & (v3 < v2) & (v2 < v1)
+    blue = (v1 < v2) & (v2 < v3) & (v3 < v4)
+    data['color'] = np.where(blue, 'blue', np.where(gold, 'gold', 'grey'))
+    return data
+
+
+def local_extrema(high, low, order=30):
+    """
+    Find the local minimums and maximums and keep only the most extreme one of the consecutive
+    minimums or maximums, so they alternate. The last group is kept as it is.
+    Parameters:
+    - high: array like, high prices
+    - low: array like, low prices
+    - order: int, number of bars on each side to compare
+
+    Return: numpy int8 array, 1 at the maximums, -1 at the minimums and 0 elsewhere
+    """
+    high = np.asarray(high)
+    low = np.asarray(low)
+    kind = np.zeros(len(high), dtype=np.int8)
+    kind[argrelextrema(low, np.less, order=order)[0]] = -1
+    kind[argrelextrema(high, np.greater, order=order)[0]] = 1
+
+    states = np.flatnonzero(kind)
+    if len(states) < 2:
+        return kind
+    state_kind = kind[states]
+    # the best maximum is the highest high, the best minimum is the lowest low
+    key = np.where(state_kind == 1, high[states], -low[states])
+    new_group = np.r_[True, state_kind[1:] != state_kind[:-1]]
+    group = np.cumsum(new_group) - 1
+    best = np.flatnonzero(key == np.maximum.reduceat(key, np.flatnonzero(new_group))[group])
+    # first one on ties
+    best = best[np.r_[True, group[best][1:] != group[best][:-1]]]
+
+    keep = group == group[-1]
+    keep[best] = True
+    kind[states[~keep]] = 0
+    return kind
+
+
+def local_texts(kind, high, low, first=None, fall_icon='💸', crash_icon='😭💔', crash_level=50):
+    """
+    Labels of the local minimums and maximums: the rise or fall from the previous one and the price
+    Parameters:
+    - kind: numpy array, 1 at the maximums, -1 at the minimums, e.g. the result of local_extrema
+    - high: array like, high prices
+    - low: array like, low prices
+    - first: int, position labeled only with the price, default the first local
+    - fall_icon: str, icon of the falls below crash_level %
+    - crash_icon: str, icon of the bigger falls
+    - crash_level: float, fall in % from the crash_icon is used
+
+    Return: numpy object array of the labels, empty string elsewhere
+    """
+    high = np.asarray(high)
+    low = np.asarray(low)
+    texts = np.full(len(kind), '', dtype=object)
+    states = np.flatnonzero(kind)
+    if len(states) == 0:
+        return texts
+    if first is None:
+        first = states[0]
+    texts[first] = f"${round(low[first] if kind[first] == -1 else high[first], 2)}"
+
+    prev_high, prev_low = high[states[:-1]], low[states[:-1]]
+    current_high, current_low = high[states[1:]], low[states[1:]]
+    rise = (current_high/ prev_low -1)*100
+    fall = (1-(current_low / prev_high))*100
+    for i, position in enumerate(states[1:]):
+        if kind[position] == 1:
+            if rise[i]>100:
+                texts[position] = f'🚀🌌{round(((rise[i]+100)/100), 2)}x<br>${round(current_high[i], 2)}'
+            else:
+                texts[position] = f'🚀{round(rise[i], 2)}%<br>${round(current_high[i], 2)}'
+        else:
+            icon = fall_icon if round(fall[i], 2) < crash_level else crash_icon
+            texts[position] = f'{icon}{round(fall[i], 2)}%<br>${round(current_low[i], 2)}'
+    return texts
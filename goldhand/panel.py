@@ -0,0 +1,278 @@
+import numpy as np
+import pandas as pd
+from goldhand.indicators import _smma_kernel
+
+
+class Panel:
+    def __init__(self, df):
+        """
+        2-D (date x ticker) arrays of many tickers for computing the indicators of a whole universe at once.
+        The rows are the dates of all the tickers, a ticker has NaN at the dates without a bar
+        (e.g. before its first bar or on the weekends of a crypto universe) and the indicators skip these rows,
+        so they are the same as the ones of the ticker alone.
+
+        Parameters:
+        - df: pd.DataFrame in long format with columns ['date', 'open', 'high', 'low', 'close', 'volume', 'ticker'],
+              e.g. the result of download_many
+        """
+        self.df = df.sort_values(['ticker', 'date'], kind='stable').reset_index(drop=True)
+        self.rows, self.dates = pd.factorize(self.df['date'], sort=True)
+        self.cols, self.tickers = pd.factorize(self.df['ticker'], sort=True)
+        if ((np.diff(self.rows) == 0) & (np.diff(self.cols) == 0)).any():
+            raise ValueError('Index contains duplicate date and ticker entries')
+        # row of the last bar of every ticker
+        self.last_rows = np.zeros(len(self.tickers), dtype=np.int64)
+        self.last_rows[self.cols] = self.rows
+
+    def array(self, column):
+        """
+        2-D array of a column of the long DataFrame, the same as the values of df.pivot(index='date', columns='ticker')
+        Parameters:
+        - column: str or array like in the order of self.df
+        Return: numpy array of shape (dates, tickers), NaN at the dates without a bar of a ticker
+        """
+        values = self.df[column].values if isinstance(column, str) else np.asarray(column)
+        if values.dtype.kind == 'M':
+            out = np.full((len(self.dates), len(self.tickers)), np.datetime64('NaT'), dtype=values.dtype)
+        elif values.dtype.kind in 'fiu':
+            out = np.full((len(self.dates), len(self.tickers)), np.nan)
+        else:
+            out = np.full((len(self.dates), len(self.tickers)), None, dtype=object)
+        out[self.rows, self.cols] = values
+        return out
+
+    def frame(self, values):
+        """
+        DataFrame of a 2-D array with the dates as index and the tickers as columns
+        Parameters:
+        - values: numpy array of shape (dates, tickers)
+        Return: pd.DataFrame
+        """
+        return pd.DataFrame(values, index=pd.Index(self.dates, name='date'), columns=pd.Index(self.tickers, name='ticker'))
+
+    def to_long(self, arrays):
+        """
+        Add 2-D arrays to the long DataFrame
+        Parameters:
+        - arrays: dictionary of column name and numpy array of shape (dates, tickers)
+        Return: pd.DataFrame, copy of self.df with the added columns
+        """
+        df = self.df.copy()
+        for name, values in arrays.items():
+            df[name] = values[self.rows, self.cols]
+        return df
+
+    def last(self, arrays):
+        """
+        Values of the last bar of every ticker, e.g. for screening a universe
+        Parameters:
+        - arrays: dictionary of column name and numpy array of shape (dates, tickers)
+        Return: pd.DataFrame, one row per ticker with the date of its last bar
+        """
+        columns = np.arange(len(self.tickers))
+        df = pd.DataFrame({'date': self.dates[self.last_rows]}, index=self.tickers)
+        for name, values in arrays.items():
+            df[name] = values[self.last_rows, columns]
+        df.index.name = 'ticker'
+        return df.reset_index()
+
+
+def _on_bars(function, values, *args, **kwargs):
+    """
+    Apply a function to the bars of every column of a 2-D array, skipping the NaN rows.
+    The bars of each column are moved to the top in their order, the results are moved back to the dates of the bars.
+    Return: the result of the function, a numpy array or a tuple of numpy arrays, NaN at the skipped rows
+    """
+    valid = ~np.isnan(values)
+    if valid.all():
+        return function(values, *args, **kwargs)
+    order = np.argsort(~valid, axis=0, kind='stable')
+    result = function(np.take_along_axis(values, order, axis=0), *args, **kwargs)
+
+    def to_dates(bars):
+        out = np.full(values.shape, np.nan)
+        np.put_along_axis(out, order, bars, axis=0)
+        out[~valid] = np.nan
+        return out
+
+    if isinstance(result, tuple):
+        return tuple(to_dates(x) for x in result)
+    return to_dates(result)
+
+
+def _window_sums(values, window):
+    """
+    Sums of the last window values and squared values over the rows of a 2-D array with cumulative sums.
+    The values are shifted by the first value of each column to keep the cumulative sums small.
+    Return: tuple of numpy arrays, (shift, sum, sum of squares, number of values in the window)
+    """
+    valid = ~np.isnan(values)
+    first = np.where(valid.any(axis=0), valid.argmax(axis=0), 0)
+    shift = values[first, np.arange(values.shape[1])]
+    shifted = np.where(valid, values - shift, 0.0)
+
+    def window_sum(x):
+        total = np.cumsum(x, axis=0)
+        out = total.copy()
+        out[window:] = total[window:] - total[:-window]
+        return out
+
+    return shift, window_sum(shifted), window_sum(shifted**2), window_sum(valid.astype(np.int64))
+
+
+def _rolling_mean(values, window):
+    shift, total, _, count = _window_sums(values, window)
+    return np.where(count == window, total/window + shift, np.nan)
+
+
+def _rolling_std(values, window):
+    _, total, squares, count = _window_sums(values, window)
+    var = np.maximum(squares - total**2/window, 0) / (window - 1)
+    return np.where(count == window, np.sqrt(var), np.nan)
+
+
+def rolling_mean(values, window):
+    """
+    Rolling mean over the bars of every column of a 2-D array, NaN until window bars
+    """
+    return _on_bars(_rolling_mean, values, window)
+
+
+def rolling_std(values, window):
+    """
+    Rolling sample standard deviation over the bars of every column of a 2-D array, NaN until window bars
+    """
+    return _on_bars(_rolling_std, values, window)
+
+
+def _rsi(close, window, wilder):
+    delta = np.diff(close, axis=0, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    gain[np.isnan(delta)] = np.nan
+    loss[np.isnan(delta)] = np.nan
+    if wilder:
+        avg_gain = pd.DataFrame(gain).ewm(alpha=1/window, min_periods=window).mean().values
+        avg_loss = pd.DataFrame(loss).ewm(alpha=1/window, min_periods=window).mean().values
+    else:
+        avg_gain = _rolling_mean(gain, window)
+        avg_loss = _rolling_mean(loss, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+def panel_rsi(close, window=14, wilder=False):
+    """
+    RSI of every column of a 2-D array
+    Parameters:
+    - close: numpy array of shape (dates, tickers)
+    - window: int, window size
+    - wilder: bool, Wilder smoothing like get_olhc_data, False for the rolling mean RSI of GoldHand
+    Return: numpy array of shape (dates, tickers)
+    """
+    return _on_bars(_rsi, close, window, wilder)
+
+
+def panel_bollinger(close, window=20, n_std=2):
+    """
+    Bollinger bands of every column of a 2-D array
+    Parameters:
+    - close: numpy array of shape (dates, tickers)
+    - window: int, window size
+    - n_std: float, width of the bands in standard deviations
+    Return: tuple of numpy arrays, (mid, upper, lower)
+    """
+    mid = rolling_mean(close, window)
+    std = rolling_std(close, window)
+    return mid, mid + n_std*std, mid - n_std*std
+
+
+def _smma(values, windows):
+    # the bars of every column are at the top, the numba kernel of smma_multi runs on each column
+    n_bars = (~np.isnan(values)).sum(axis=0)
+    columns = np.ascontiguousarray(values.T)
+    out = np.full((len(windows),) + values.shape, np.nan)
+    for j, n in enumerate(n_bars):
+        out[:, :n, j] = _smma_kernel(columns[j, :n], windows).T
+    return tuple(out)
+
+
+def panel_smma(values, windows):
+    """
+    Smoothed Simple Moving Averages of every column of a 2-D array, started at the first bar of each column
+    Parameters:
+    - values: numpy array of shape (dates, tickers)
+    - windows: list of int, window sizes
+    Return: list of numpy arrays of shape (dates, tickers), one per window
+    """
+    return list(_on_bars(_smma, values, np.asarray(windows, dtype=np.int64)))
+
+
+def panel_goldhand_line(high, low, windows=(15, 19, 25, 29)):
+    """
+    GoldHand line of every column of 2-D arrays
+    Parameters:
+    - high: numpy array of shape (dates, tickers)
+    - low: numpy array of shape (dates, tickers)
+    - windows: tuple of 4 int, SMMA windows of v1, v2, v3 and v4
+    Return: dictionary of hl2, v1, v2, v3, v4 and color arrays
+    """
+    hl2 = (high + low)/2
+    v1, v2, v3, v4 = panel_smma(hl2, windows)
+    gold = (v4 < v3) & (v3 < v2) & (v2 < v1)
+    blue = (v1 < v2) & (v2 < v3) & (v3 < v4)
+    color = np.where(blue, 'blue', np.where(gold, 'gold', 'grey')).astype(object)
+    color[np.isnan(hl2)] = None
+    return {'hl2': hl2, 'v1': v1, 'v2': v2, 'v3': v3, 'v4': v4, 'color': color}
+
+
+def panel_indicators(panel, wilder_rsi=False, sma_windows=(50, 100, 200), bb_window=20, line_windows=(15, 19, 25, 29)):
+    """
+    Compute the GoldHand indicators of all tickers of a panel in one pass
+    Parameters:
+    - panel: Panel
+    - wilder_rsi: bool, Wilder RSI like get_olhc_data, False for the RSI of GoldHand
+    - sma_windows: tuple of int, SMA windows
+    - bb_window: int, Bollinger band window
+    - line_windows: tuple of 4 int, SMMA windows of the GoldHand line
+    Return: dictionary of the GoldHand column names and numpy arrays of shape (dates, tickers)
+    """
+    close = panel.array('close')
+    out = {'rsi': panel_rsi(close, 14, wilder=wilder_rsi)}
+    for window in sma_windows:
+        out[f'sma_{window}'] = rolling_mean(close, window)
+    for window in sma_windows:
+        out[f'diff_sma{window}'] = (close/out[f'sma_{window}'] -1)*100
+
+    mid, upper, lower = panel_bollinger(close, bb_window)
+    out.update({'bb_mid': mid, 'bb_upper': upper, 'bb_lower': lower,
+                'diff_upper_bb': (upper/close -1)*100, 'diff_lower_bb': (lower/close -1)*100})
+    out.update(panel_goldhand_line(panel.array('high'), panel.array('low'), line_windows))
+    return out
+
+
+def add_panel_indicators(df, **kwargs):
+    """
+    Add the GoldHand indicators to a long format DataFrame of many tickers
+    Parameters:
+    - df: pd.DataFrame with columns ['date', 'open', 'high', 'low', 'close', 'volume', 'ticker']
+    - kwargs: parameters of panel_indicators
+    Return: pd.DataFrame sorted by ticker and date with the indicator columns
+    """
+    panel = Panel(df)
+    return panel.to_long(panel_indicators(panel, **kwargs))
+
+
+def latest_indicators(df, **kwargs):
+    """
+    Last indicator values of every ticker of a long format DataFrame, e.g. for screening a universe
+    Parameters:
+    - df: pd.DataFrame with columns ['date', 'open', 'high', 'low', 'close', 'volume', 'ticker']
+    - kwargs: parameters of panel_indicators
+    Return: pd.DataFrame, one row per ticker
+    """
+    panel = Panel(df)
+    arrays = panel_indicators(panel, **kwargs)
+    arrays['close'] = panel.array('close')
+    return panel.last(arrays)
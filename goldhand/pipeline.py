@@ -0,0 +1,233 @@
+import numpy as np
+from goldhand.indicators import smma_multi
+
+
+class Step:
+    def __init__(self, name, function, inputs, output=True, **params):
+        """
+        One indicator or intermediate result of a Pipeline
+
+        Parameters:
+        - name: str, name of the result, the column name for outputs
+        - function: function called with the input Series and the params, returns a Series or an array
+        - inputs: list of str, names of DataFrame columns or other steps
+        - output: bool, add the result to the DataFrame, False for intermediates
+        - params: keyword arguments of the function
+        """
+        self.name = name
+        self.function = function
+        self.inputs = list(inputs)
+        self.output = output
+        self.params = params
+
+    def __repr__(self):
+        return f"Step({self.name!r}, inputs={self.inputs}, output={self.output})"
+
+
+class Pipeline:
+    def __init__(self, steps):
+        """
+        Set of indicators computed from their declared inputs. Every step is computed once per run,
+        so a shared intermediate, e.g. the 20 bars rolling mean of the Bollinger bands, is reused.
+
+        Parameters:
+        - steps: list of Step, in the order of the output columns. When a name is repeated the first step is kept
+                 and it is an output if any of them is.
+        """
+        self.steps = {}
+        for step in steps:
+            kept = self.steps.get(step.name)
+            if kept is None:
+                self.steps[step.name] = step
+            elif step.output and not kept.output:
+                # a new Step, the steps of the caller and of other pipelines are never changed
+                self.steps[step.name] = Step(kept.name, kept.function, kept.inputs, output=True, **kept.params)
+
+    def __contains__(self, name):
+        return name in self.steps
+
+    def __add__(self, other):
+        return Pipeline(list(self.steps.values()) + list(other.steps.values()))
+
+    @property
+    def outputs(self):
+        """
+        Names of the columns added to the DataFrame
+        """
+        return [name for name, step in self.steps.items() if step.output]
+
+    def run(self, df, columns=None, cache=None):
+        """
+        Add indicator columns to a DataFrame
+        Parameters:
+        - df: Pandas DataFrame with the input columns, e.g. close
+        - columns: list of str, columns to add with everything they depend on, default all outputs
+        - cache: dictionary of the already computed results, kept between runs on the same DataFrame
+        Return: DataFrame with the added columns
+        """
+        cache = {} if cache is None else cache
+        for name in (self.outputs if columns is None else columns):
+            self.compute(df, name, cache)
+        return df
+
+    def compute(self, df, name, cache):
+        """
+        Compute one step and its inputs that are not in the cache yet
+        Parameters:
+        - df: Pandas DataFrame
+        - name: str, name of the step or of a DataFrame column
+        - cache: dictionary of the already computed results
+        Return: the result of the step
+        """
+        if name in cache:
+            return cache[name]
+        step = self.steps.get(name)
+        if step is None:
+            if name in df.columns:
+                return df[name]
+            raise KeyError(f"Unknown indicator: {name}")
+        values = step.function(*[self.compute(df, x, cache) for x in step.inputs], **step.params)
+        cache[name] = values
+        if step.output:
+            df[name] = values
+        return values
+
+
+def _same(x):
+    return x
+
+
+def _diff(x):
+    return x.diff()
+
+
+def _gain(delta):
+    return delta.clip(lower=0)
+
+
+def _loss(delta):
+    return -delta.clip(upper=0)
+
+
+def _rolling_mean(x, window):
+    return x.rolling(window).mean()
+
+
+def _rolling_std(x, window):
+    return x.rolling(window).std()
+
+
+def _wilder_mean(x, window):
+    return x.ewm(alpha=1/window, min_periods=window).mean()
+
+
+def _rsi(avg_gain, avg_loss):
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+def _diff_pct(x, base):
+    return (x/base -1)*100
+
+
+def _band(mid, std, n_std):
+    return mid + n_std*std
+
+
+def _hl2(high, low):
+    return (high + low)/2
+
+
+def _smma_lines(hl2, windows):
+    return smma_multi(hl2.values, windows)
+
+
+def _line(lines, index):
+    return lines[:, index]
+
+
+def _line_color(v1, v2, v3, v4):
+    gold = (v4 < v3) & (v3 < v2) & (v2 < v1)
+    blue = (v1 < v2) & (v2 < v3) & (v3 < v4)
+    return np.where(blue, 'blue', np.where(gold, 'gold', 'grey'))
+
+
+def rsi_steps(window=14, wilder=False):
+    """
+    Steps of the RSI
+    Parameters:
+    - window: int, window size
+    - wilder: bool, Wilder smoothing like get_olhc_data, False for the rolling mean RSI of GoldHand
+    Return: list of Step
+    """
+    average = _wilder_mean if wilder else _rolling_mean
+    kind = 'wilder' if wilder else 'mean'
+    return [
+        Step('delta_close', _diff, ['close'], output=False),
+        Step('gain', _gain, ['delta_close'], output=False),
+        Step('loss', _loss, ['delta_close'], output=False),
+        Step(f'avg_gain_{kind}_{window}', average, ['gain'], output=False, window=window),
+        Step(f'avg_loss_{kind}_{window}', average, ['loss'], output=False, window=window),
+        Step('rsi', _rsi, [f'avg_gain_{kind}_{window}', f'avg_loss_{kind}_{window}']),
+    ]
+
+
+def sma_steps(*windows):
+    """
+    Steps of the SMAs of the close and the distance of the close from them in %
+    Parameters:
+    - windows: int, window sizes
+    Return: list of Step, the SMAs first and then the distances
+    """
+    smas = [Step(f'sma_{x}', _rolling_mean, ['close'], window=x) for x in windows]
+    diffs = [Step(f'diff_sma{x}', _diff_pct, ['close', f'sma_{x}']) for x in windows]
+    return smas + diffs
+
+
+def bollinger_steps(window=20, n_std=2):
+    """
+    Steps of the Bollinger bands and the distance of the bands from the close in %
+    Parameters:
+    - window: int, window size, the mid band is the sma of this window
+    - n_std: float, width of the bands in standard deviations
+    Return: list of Step
+    """
+    return [
+        Step(f'sma_{window}', _rolling_mean, ['close'], output=False, window=window),
+        Step(f'std_{window}', _rolling_std, ['close'], output=False, window=window),
+        Step('bb_mid', _same, [f'sma_{window}']),
+        Step('bb_upper', _band, [f'sma_{window}', f'std_{window}'], n_std=n_std),
+        Step('bb_lower', _band, [f'sma_{window}', f'std_{window}'], n_std=-n_std),
+        Step('diff_upper_bb', _diff_pct, ['bb_upper', 'close']),
+        Step('diff_lower_bb', _diff_pct, ['bb_lower', 'close']),
+    ]
+
+
+def goldhand_line_steps(windows=(15, 19, 25, 29)):
+    """
+    Steps of the GoldHand line: hl2, the v1-v4 SMMA lines and the color of the line
+    Parameters:
+    - windows: tuple of 4 int, SMMA windows of v1, v2, v3 and v4
+    Return: list of Step
+    """
+    steps = [Step('hl2', _hl2, ['high', 'low']),
+             Step('smma_lines', _smma_lines, ['hl2'], output=False, windows=windows)]
+    steps += [Step(f'v{i + 1}', _line, ['smma_lines'], index=i) for i in range(4)]
+    steps.append(Step('color', _line_color, ['v1', 'v2', 'v3', 'v4']))
+    return steps
+
+
+def goldhand_pipeline():
+    """
+    Indicators of the GoldHand class: rolling mean RSI, SMAs and Bollinger bands
+    Return: Pipeline
+    """
+    return Pipeline(rsi_steps(14) + sma_steps(50, 100, 200) + bollinger_steps(20))
+
+
+def olhc_pipeline():
+    """
+    Indicators of get_olhc_data: Wilder RSI, SMAs and Bollinger bands
+    Return: Pipeline
+    """
+    return Pipeline(rsi_steps(14, wilder=True) + sma_steps(50) + sma_steps(100) + sma_steps(200) + bollinger_steps(20))
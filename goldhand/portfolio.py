@@ -0,0 +1,144 @@
+from concurrent.futures import ProcessPoolExecutor
+from IPython.display import display
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from goldhand.backtest import Backtest
+from goldhand.sweep import frame_sources, load_frame
+
+
+TRADE_COLUMNS = ['ticker', 'trade_id', 'status', 'buy_date', 'sell_date', 'buy_price', 'sell_price', 'result', 'days_in_trade', 'buy_bar', 'sell_bar']
+
+
+def backtest_ticker(data, strategy_function, params):
+    """
+    Backtest one ticker and keep only the summary, the main trade columns and the equity curve
+    Parameters:
+    - data: pandas DataFrame with the indicators, e.g. GoldHand(ticker).df
+    - strategy_function: strategy of the Backtest class
+    - params: dictionary of the strategy parameters
+    Return: tuple of (trades summary, trades, equity Series indexed by date, Series of 1 in position and 0 out of it)
+    """
+    backtest = Backtest(data, strategy_function, **params)
+    trades = backtest.trades[[x for x in TRADE_COLUMNS if x in backtest.trades.columns]]
+    return backtest.trades_summary, trades, backtest.equity, backtest.exposure.astype(np.float64)
+
+
+def portfolio_ticker(ticker, source, strategy_function, params, range='18y', interval='1d'):
+    """
+    Build the data of one ticker and backtest it, run in the worker processes
+    Parameters:
+    - ticker: str, ticker symbol
+    - source: DataFrame or DataProvider, see load_frame
+    - strategy_function: strategy of the Backtest class
+    - params: dictionary of the strategy parameters
+    - range: str, time range of the data
+    - interval: str, interval of the data
+    Return: the result of backtest_ticker, None when the ticker has no data
+    """
+    data = load_frame(ticker, source, strategy_function, range, interval)
+    return None if data is None else backtest_ticker(data, strategy_function, params)
+
+
+class Portfolio:
+    def __init__(self, tickers, strategy_function, max_workers=None, provider=None, range='18y', interval='1d', plot_title='', **kwargs):
+        """
+        Backtest a strategy on many tickers in parallel and combine them into one portfolio.
+        The capital is split equally between the tickers at the start and every part is traded by the strategy on its ticker.
+
+        Parameters:
+        - tickers: list of str, DataFrame with a name column (e.g. Tw().get_top_n_stocks_by_sector()),
+                   or dictionary of ticker and DataFrame with the indicators, see frame_sources
+        - strategy_function: strategy of the Backtest class, e.g. goldhand_line_strategy
+        - max_workers: int, number of processes, 1 runs in the current process
+        - provider: DataProvider, source of the price data, default YFinanceProvider
+        - range: str, time range of the data
+        - interval: str, interval of the data
+        - plot_title: title for the plot
+        - kwargs: additional parameters to be passed to the strategy function
+        """
+        self.strategy_function = strategy_function
+        self.max_workers = max_workers
+        self.plot_title = plot_title
+        self.additional_params = kwargs
+        self.range = range
+        self.interval = interval
+        self.run(frame_sources(tickers, provider))
+        self.summary_of_portfolio()
+
+    def run(self, sources):
+        """
+        Backtest every ticker, the data of a ticker is built in its worker and only the results are sent back
+        Parameters:
+        - sources: dictionary of ticker and DataFrame or DataProvider, see frame_sources
+        """
+        args = (self.strategy_function, self.additional_params, self.range, self.interval)
+        if self.max_workers == 1:
+            results = [portfolio_ticker(ticker, source, *args) for ticker, source in sources.items()]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(portfolio_ticker, ticker, source, *args) for ticker, source in sources.items()]
+                results = [x.result() for x in futures]
+
+        # the tickers without data are left out
+        tickers = [ticker for ticker, result in zip(sources, results) if result is not None]
+        results = [x for x in results if x is not None]
+        self.tickers_summary = pd.DataFrame([x[0] for x in results])
+        trades = [x[1] for x in results if len(x[1])]
+        self.trades = pd.concat(trades, ignore_index=True) if trades else pd.DataFrame(columns=TRADE_COLUMNS)
+
+        if not results:
+            self.equity = pd.DataFrame(index=pd.DatetimeIndex([]))
+            self.positions = pd.DataFrame(index=pd.DatetimeIndex([]))
+        else:
+            # the capital of a ticker stays in cash before its first and after its last bar
+            self.equity = pd.concat([x[2] for x in results], axis=1, keys=tickers).sort_index().ffill().fillna(1.0)
+            self.positions = pd.concat([x[3] for x in results], axis=1, keys=tickers).sort_index().fillna(0.0)
+        self.portfolio_equity = self.equity.mean(axis=1)
+        self.exposure = self.positions.mean(axis=1)
+
+    def summary_of_portfolio(self):
+        """
+        Calculate the summary of the portfolio
+        """
+        equity = self.portfolio_equity
+        drawdown = equity / equity.cummax() - 1
+        results = self.trades['result'].astype(float)
+        self.portfolio_summary = {
+            'number_of_tickers': self.equity.shape[1],
+            'number_of_trades': len(self.trades),
+            'win_ratio(%)': round((results > 1).mean()*100, 2) if len(results) else np.nan,
+            'average_res(%)': round((results.mean()-1)*100, 2) if len(results) else np.nan,
+            'median_res(%)': round((results.median()-1)*100, 2) if len(results) else np.nan,
+            'portfolio_result': round(equity.iloc[-1], 2) if len(equity) else np.nan,
+            'max_drawdown(%)': round(drawdown.min()*100, 2),
+            'average_exposure(%)': round(self.exposure.mean()*100, 2),
+            'max_open_positions': int(self.positions.sum(axis=1).max()) if len(equity) else 0,
+            'first_data_date': equity.index[0].strftime('%Y-%m-%d') if len(equity) else None,
+            'last_data_date': equity.index[-1].strftime('%Y-%m-%d') if len(equity) else None,
+        }
+        self.portfolio_summary.update(self.additional_params)
+
+    def show_equity(self):
+        """
+        Plot the equity curve of the portfolio and the share of the tickers with an open position
+        """
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=self.portfolio_equity.index, y=self.portfolio_equity, line=dict(color='#214e34', width=2), name='Portfolio'))
+        fig.add_trace(go.Scatter(x=self.exposure.index, y=self.exposure, line=dict(color='lightblue', width=1), name='Exposure', yaxis='y2'))
+        fig.update_layout(plot_bgcolor='white', title=self.plot_title, height=700,
+                          yaxis=dict(title='Equity (x)'), yaxis2=dict(title='Exposure', overlaying='y', side='right', range=[0, 1], showgrid=False))
+        fig.update_xaxes(mirror=True, ticks='outside', showline=True, linecolor='black', gridcolor='lightgrey')
+        fig.update_yaxes(mirror=True, ticks='outside', showline=True, linecolor='black', gridcolor='lightgrey')
+        return fig
+
+    def summarize_strategy(self):
+        """
+        Display the summary of the portfolio:
+        - Summary of the portfolio
+        - Equity curve in interactive plot
+        - Summary of the tickers in DataFrame
+        """
+        display(pd.DataFrame(self.portfolio_summary, index=['Portfolio summary']).T)
+        self.show_equity().show()
+        display(self.tickers_summary)
@@ -0,0 +1,177 @@
+import os
+import pandas as pd
+from goldhand.cache import PriceCache
+
+
+def convert_dates(dates, date_type='datetime64'):
+    """
+    Convert a date column to the native datetime64 type or to Python datetime.date objects
+    Parameters:
+    - dates: Pandas Series of dates
+    - date_type: str, 'datetime64' or 'date' for datetime.date objects as in the earlier versions
+    Return: Pandas Series
+    """
+    if date_type == 'datetime64':
+        return pd.to_datetime(dates)
+    if date_type == 'date':
+        return pd.to_datetime(dates).dt.date
+    raise ValueError(f"Unknown date type: {date_type}")
+
+
+class DataProvider:
+    """
+    Base class of the price data sources used by GoldHand, get_olhc_data and the strategy plots.
+    A provider returns DataFrames with the columns ['date', 'open', 'high', 'low', 'close', 'volume', 'ticker'].
+    """
+
+    columns = ['date', 'open', 'high', 'low', 'close', 'volume', 'ticker']
+
+    def download(self, ticker, period='max', interval='1d', auto_adjust=True, start=None):
+        """
+        Get historical data for a single ticker
+        Parameters:
+        - ticker: str, symbol (e.g., 'AAPL', 'BTC-USD')
+        - period: str, data period (e.g. '1y', '2y', 'max')
+        - interval: str, data interval (e.g. '1d', '1h')
+        - auto_adjust: bool, prices adjusted for splits and dividends
+        - start: date, return only the bars from this date, overrides period
+        Return: pd.DataFrame
+        """
+        raise NotImplementedError
+
+    def download_many(self, tickers, period='max', interval='1d', auto_adjust=True):
+        """
+        Get historical data for many tickers in long format
+        Parameters:
+        - tickers: list of str, symbols
+        - period: str, data period (e.g. '1y', '2y', 'max')
+        - interval: str, data interval (e.g. '1d', '1h')
+        - auto_adjust: bool, prices adjusted for splits and dividends
+        Return: pd.DataFrame
+        """
+        frames = [self.download(x, period=period, interval=interval, auto_adjust=auto_adjust) for x in tickers]
+        frames = [x for x in frames if not x.empty]
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(frames, ignore_index=True)
+
+    @classmethod
+    def format_frame(cls, df, ticker, period='max', start=None):
+        """
+        Bring a stored DataFrame to the goldhand schema and cut it to the requested period
+        Parameters:
+        - df: pd.DataFrame, data of one ticker
+        - ticker: str, symbol added as ticker column when missing
+        - period: str, data period counted back from the last bar
+        - start: date, keep only the bars from this date, overrides period
+        Return: pd.DataFrame
+        """
+        if df.empty:
+            return pd.DataFrame()
+        df = df.copy()
+        df.columns = df.columns.str.lower()
+        if 'date' not in df.columns and 'datetime' in df.columns:
+            df.rename(columns={'datetime': 'date'}, inplace=True)
+        dates = pd.to_datetime(df['date'])
+        df['date'] = dates
+        if 'ticker' not in df.columns:
+            df['ticker'] = ticker
+
+        if start is None:
+            start = PriceCache.period_start(period, end=dates.max())
+        if start is not None:
+            df = df[(dates >= pd.Timestamp(start)).values]
+        df = df[[c for c in cls.columns if c in df.columns]]
+        return df.reset_index(drop=True)
+
+
+class YFinanceProvider(DataProvider):
+    """
+    Download the data from Yahoo Finance with yfinance
+    """
+
+    def download(self, ticker, period='max', interval='1d', auto_adjust=True, start=None):
+        from goldhand.stocks import GoldHand
+        return GoldHand.download(ticker, period=period, interval=interval, auto_adjust=auto_adjust, start=start)
+
+    def download_many(self, tickers, period='max', interval='1d', auto_adjust=True):
+        from goldhand.helpers import download_many
+        return download_many(tickers, period=period, interval=interval, auto_adjust=auto_adjust)
+
+
+class FileProvider(DataProvider):
+    def __init__(self, directory, format='parquet'):
+        """
+        Read the data from a local folder of CSV or Parquet files, one file per ticker.
+        The files are looked up as <ticker>_<interval>.<format> and then <ticker>.<format>.
+
+        Parameters:
+        - directory: str, folder of the files
+        - format: str, 'parquet' or 'csv'
+        """
+        if format not in ('parquet', 'csv'):
+            raise ValueError(f"Unknown file format: {format}")
+        self.directory = os.path.expanduser(directory)
+        self.format = format
+
+    def path(self, ticker, interval='1d'):
+        """
+        Path of the file of a ticker
+        Parameters:
+        - ticker: str, symbol
+        - interval: str, data interval
+        Return: str, path of the existing file or the default path to write to
+        """
+        with_interval = os.path.join(self.directory, f"{ticker}_{interval}.{self.format}")
+        without_interval = os.path.join(self.directory, f"{ticker}.{self.format}")
+        if not os.path.exists(with_interval) and os.path.exists(without_interval):
+            return without_interval
+        return with_interval
+
+    def read(self, path):
+        """
+        Read one file of the store
+        """
+        if self.format == 'parquet':
+            return pd.read_parquet(path)
+        return pd.read_csv(path)
+
+    def download(self, ticker, period='max', interval='1d', auto_adjust=True, start=None):
+        path = self.path(ticker, interval)
+        if not os.path.exists(path):
+            print(f"Warning: No data found for ticker {ticker}")
+            return pd.DataFrame()
+        return self.format_frame(self.read(path), ticker, period=period, start=start)
+
+    def save(self, df, interval='1d'):
+        """
+        Write a long format DataFrame to the store, one file per ticker
+        Parameters:
+        - df: pd.DataFrame with a ticker column, e.g. the result of download_many
+        - interval: str, data interval used in the file names
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        for ticker, tdf in df.groupby('ticker'):
+            path = os.path.join(self.directory, f"{ticker}_{interval}.{self.format}")
+            if self.format == 'parquet':
+                tdf.to_parquet(path, index=False)
+            else:
+                tdf.to_csv(path, index=False)
+
+
+class FrameProvider(DataProvider):
+    def __init__(self, df):
+        """
+        Serve the data from an in-memory long format DataFrame
+
+        Parameters:
+        - df: pd.DataFrame with columns ['date', 'open', 'high', 'low', 'close', 'volume', 'ticker']
+        """
+        self.df = df
+        self.groups = {ticker: tdf for ticker, tdf in df.groupby('ticker', sort=False)}
+
+    def download(self, ticker, period='max', interval='1d', auto_adjust=True, start=None):
+        if ticker not in self.groups:
+            print(f"Warning: No data found for ticker {ticker}")
+            return pd.DataFrame()
+        return self.format_frame(self.groups[ticker], ticker, period=period, start=start)
@@ -2,14 +2,16 @@ from datetime import datetime, timedelta
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
-from scipy.signal import argrelextrema
 import numpy as np
 import yfinance as yf
 import requests
 import json
+from goldhand.indicators import smma, add_goldhand_line, local_extrema, local_texts
+from goldhand.pipeline import goldhand_pipeline
+from goldhand.providers import convert_dates
 
 class GoldHand:
-    def __init__(self, ticker, ad_ticker=True, range='18y', interval='1d'):
+    def __init__(self, ticker, ad_ticker=True, range='18y', interval='1d', cache=None, provider=None, lazy=False, pipeline=None, date_type='datetime64'):
         """
         GoldHand class to download and analyze stock data
 
@@ -18,17 +20,27 @@ class GoldHand:
         - ad_ticker: bool, add ticker column to the DataFrame
         - range: str, time range to download data for example 5y,1y, 1mo, 1d, 1h
         - interval: str, interval to download data for example 1d, 1h, 5m
+        - cache: PriceCache, on-disk cache to load the data from, only the new bars are downloaded
+        - provider: DataProvider, source of the price data, default is yfinance
+        - lazy: bool, compute the indicators on first use with require instead of all of them after the download
+        - pipeline: Pipeline, indicators to compute, default goldhand_pipeline()
+        - date_type: str, type of the date column, 'datetime64' or 'date' for datetime.date objects as in the earlier versions
         """
        
         self.ad_ticker = ad_ticker
         self.range = range
         self.interval = interval
         self.ticker = ticker
+        self.cache = cache
+        self.provider = provider
+        self.lazy = lazy
+        self.pipeline = goldhand_pipeline() if pipeline is None else pipeline
+        self.date_type = date_type
         self.df = None
         self.download_historical_data()
 
     @staticmethod
-    def download(ticker: str, period: str = 'max', interval: str = '1d', auto_adjust: bool = True) -> pd.DataFrame:
+    def download(ticker: str, period: str = 'max', interval: str = '1d', auto_adjust: bool = True, start=None) -> pd.DataFrame:
         """
         Download historical data for a single ticker.
         
@@ -36,6 +48,7 @@ class GoldHand:
         - ticker: str, symbol (e.g., 'AAPL', 'BTC-USD')
         - period: str, data period to download (e.g. '1y', '2y', 'max')
         - interval: str, data interval (e.g. '1d', '1h')
+        - start: date, download only the bars from this date, overrides period
         
         Returns:
         - pd.DataFrame with lowercase columns ['date', 'open', 'high', 'low', 'close', 'volume', 'ticker']
@@ -43,7 +56,10 @@ class GoldHand:
         try:
             # Using yfinance to download data
             # auto_adjust=True fixes the Close price for splits and dividends
-            df = yf.download(ticker, period=period, interval=interval, auto_adjust=auto_adjust, progress=False, multi_level_index=False)
+            if start is None:
+                df = yf.download(ticker, period=period, interval=interval, auto_adjust=auto_adjust, progress=False, multi_level_index=False)
+            else:
+                df = yf.download(ticker, start=start, interval=interval, auto_adjust=auto_adjust, progress=False, multi_level_index=False)
             
             if df.empty:
                 print(f"Warning: No data found for ticker {ticker}")
@@ -58,9 +74,9 @@ class GoldHand:
                 if 'datetime' in df.columns:
                     df.rename(columns={'datetime': 'date'}, inplace=True)
             
-            # Ensure 'date' column is datetime.date objects for compatibility with existing logic
+            # Ensure 'date' column is datetime64
             if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date']).dt.date
+                df['date'] = pd.to_datetime(df['date'])
 
             # Add ticker column
             df['ticker'] = ticker
@@ -87,14 +103,7 @@ class GoldHand:
         
         Return: DataFrame with added column
         """
-        hl2 = data['hl2'].values
-        smma_values = [hl2[0]]
-
-        for i in range(1, len(hl2)):
-            smma_val = (smma_values[-1] * (window - 1) + hl2[i]) / window
-            smma_values.append(smma_val)
-
-        data[colname] = smma_values
+        data[colname] = smma(data['hl2'].values, window)
         return data
 
 
@@ -104,130 +113,73 @@ class GoldHand:
         Download historical stock, crypto or ETF data 
         """
         # Download historical stock data for the last year
-        self.df = self.download(self.ticker, period=self.range, interval=self.interval)
+        download = self.download if self.provider is None else self.provider.download
+        if self.cache is None:
+            self.df = download(self.ticker, period=self.range, interval=self.interval)
+        else:
+            self.df = self.cache.load(self.ticker, period=self.range, interval=self.interval, download=download)
         self.df.columns = self.df.columns.str.lower()
+        self.df['date'] = convert_dates(self.df['date'], self.date_type)
         self.df['hl2'] = (self.df['high'] + self.df['low'])/2
-        
-        try:
-            # Rsi
-            window = 14
-            delta = self.df['close'].diff()
-
-            gain = delta.clip(lower=0)
-            loss = -delta.clip(upper=0)
+        self.computed = {}
 
-            avg_gain = gain.rolling(window).mean()
-            avg_loss = loss.rolling(window).mean()
+        if not self.lazy:
+            try:
+                self.require(*self.pipeline.outputs, 'local')
+            except:
+                pass
 
-            rs = avg_gain / avg_loss
-            self.df['rsi'] = 100 - (100 / (1 + rs))
-        
-
-            # SMAS
-            self.df['sma_50']  = self.df['close'].rolling(50).mean()
-            self.df['sma_100'] = self.df['close'].rolling(100).mean()
-            self.df['sma_200'] = self.df['close'].rolling(200).mean()
-
-            self.df['diff_sma50'] = (self.df['close']/self.df['sma_50'] -1)*100
-            self.df['diff_sma100'] = (self.df['close']/self.df['sma_100'] -1)*100
-            self.df['diff_sma200'] = (self.df['close']/self.df['sma_200'] -1)*100
-
-            #Bolinger bands
-            bb_window = 20
-
-            mid = self.df['close'].rolling(bb_window).mean()
-            std = self.df['close'].rolling(bb_window).std()
-
-            self.df['bb_mid']   = mid
-            self.df['bb_upper'] = mid + 2*std
-            self.df['bb_lower'] = mid - 2*std
-
-            self.df['diff_upper_bb'] = (self.df['bb_upper']/self.df['close'] -1)*100
-            self.df['diff_lower_bb'] = (self.df['bb_lower']/self.df['close'] -1)*100
-
-
-            #local min maxs
-            self.df['local'] = ''
-            self.df['local_text'] = ''
-            max_ids = list(argrelextrema(self.df['high'].values, np.greater, order=30)[0])
-            min_ids = list(argrelextrema(self.df['low'].values, np.less, order=30)[0])
-            self.df.loc[min_ids, 'local'] = 'minimum'
-            self.df.loc[max_ids, 'local'] = 'maximum'
-
-
-            states = self.df[self.df['local']!='']['local'].index.to_list()
-            problem = []
-            for i in range(0, (len(states)-1) ):
-
-                if (self.df.loc[states[i], 'local'] != self.df.loc[states[i+1], 'local']):
-                    if (len(problem)==0):
-                        continue
-                    else:
-                        problem.append(states[i])
-                        text = self.df.loc[states[i], 'local']
-                        if(text=='minimum'):
-                            real_min = self.df.loc[problem, 'low'].idxmin()
-                            problem.remove(real_min)
-                            self.df.loc[problem, 'local']=''
-                        else:
-                            real_max = self.df.loc[problem, 'high'].idxmax()
-                            problem.remove(real_max)
-                            self.df.loc[problem, 'local']=''
-
-                        problem = []
-                else:
-                    problem.append(states[i])
-
-            states = self.df[self.df['local']!='']['local'].index.to_list()
-
-            # if first is min ad the price
-            if self.df.loc[states[0], 'local']== 'minimum':
-                self.df.loc[states[0],'local_text'] = f"${round(self.df.loc[states[0], 'low'], 2)}"
-            else:
-                self.df.loc[states[0],'local_text'] = f"${round(self.df.loc[states[0], 'high'], 2)}"
-
-            
-            # add one local min max after the last one
-            if self.df.loc[states[-1], 'local']== 'maximum':
-                lowest_index_after_last_max = self.df['low'][states[-1]+1:].idxmin()
-                self.df.loc[lowest_index_after_last_max, 'local'] = 'minimum'
+    def require(self, *columns):
+        """
+        Compute the indicator columns that are not in the DataFrame yet, every indicator is computed only once
+        Parameters:
+        - columns: str, indicator columns of the pipeline or 'local' and 'local_text', e.g. 'rsi', 'sma_50', 'bb_upper'
+        Return: DataFrame with the indicator columns
+        """
+        for col in columns:
+            if col in ('local', 'local_text'):
+                if 'local' not in self.computed:
+                    self.computed['local'] = True
+                    self.add_locals()
             else:
-                high_index_after_last_min = self.df['high'][states[-1]+1:].idxmax()
-                self.df.loc[high_index_after_last_min, 'local'] = 'maximum'
+                self.pipeline.run(self.df, [col], cache=self.computed)
+        return self.df
 
-            states = self.df[self.df['local']!='']['local'].index.to_list()
+    def indicator(self, col):
+        """
+        Get one indicator column, computed on first access
+        Parameters:
+        - col: str, indicator column, e.g. 'rsi'
+        Return: Pandas Series
+        """
+        return self.require(col)[col]
 
-        except:
-            pass
-        
+    def add_locals(self):
+        """
+        Add the local minimums and maximums with the rise or fall from the previous one
+        """
+        self.df['local'] = ''
+        self.df['local_text'] = ''
+        high, low = self.df['high'].values, self.df['low'].values
         try:
-                
-            for i in range(1,len(states)):
-                prev = self.df.loc[states[i-1], 'local']
-                current= self.df.loc[states[i], 'local']
-                prev_high = self.df.loc[states[i-1], 'high']
-                prev_low = self.df.loc[states[i-1], 'low']
-                current_high = self.df.loc[states[i], 'high']
-                current_low = self.df.loc[states[i], 'low']
-                if current == 'maximum':
-                    # rise
-                    rise = (current_high/ prev_low -1)*100
-                    if rise>100:
-                        self.df.loc[states[i], 'local_text'] = f'🚀🌌{round(((rise+100)/100), 2)}x<br>${round(current_high, 2)}'
-                    else:
-                        self.df.loc[states[i], 'local_text'] = f'🚀{round(rise, 2)}%<br>${round(current_high, 2)}'
-                else:
-                    fall = round((1-(current_low / prev_high))*100, 2)
-                    if fall < 30:
-                        temj = '💸'
-                    elif fall < 50:
-                        temj = '💸'
-                    else:
-                        temj = '😭💔' 
-                    self.df.loc[states[i], 'local_text'] = f'{temj}{fall}%<br>${round(current_low, 2)}'
-            self.df.reset_index(inplace=True, drop=True)
-        except:
-            pass
+            kind = local_extrema(high, low, order=30)
+        except ValueError:
+            return
+        states = np.flatnonzero(kind)
+        if len(states) == 0:
+            return
+
+        # add one local min max after the last one
+        after = states[-1] + 1
+        if after < len(kind):
+            if kind[states[-1]] == 1 and not np.isnan(low[after:]).all():
+                kind[after + np.nanargmin(low[after:])] = -1
+            elif kind[states[-1]] == -1 and not np.isnan(high[after:]).all():
+                kind[after + np.nanargmax(high[after:])] = 1
+
+        self.df['local'] = np.select([kind == 1, kind == -1], ['maximum', 'minimum'], '').astype(object)
+        self.df['local_text'] = local_texts(kind, high, low, fall_icon='💸', crash_icon='😭💔', crash_level=50)
+        self.df.reset_index(inplace=True, drop=True)
 
     def plotly_last_year(self, plot_title, plot_height=900, ndays=500, ad_local_min_max=True):
         """
@@ -239,6 +191,9 @@ class GoldHand:
         - ad_local_min_max: bool, add local min max to the plot
         Return: plotly figure
         """
+        self.require('sma_50', 'sma_200')
+        if ad_local_min_max:
+            self.require('local')
         tdf = self.df.tail(ndays)
 
         fig = go.Figure(data=go.Ohlc(x=tdf['date'], open=tdf['open'], high=tdf['high'], low=tdf['low'],close=tdf['close']))
@@ -274,19 +229,11 @@ class GoldHand:
         - ad_local_min_max: bool, add local min max to the plot
         Return: plotly figure
         """
-        
+        if ad_local_min_max:
+            self.require('local')
         data = self.df.copy()
-        # Apply SMMA to the dataframe
-        data = self.smma(data, 15, 'v1')
-        data = self.smma(data, 19, 'v2')
-        data = self.smma(data, 25, 'v3')
-        data = self.smma(data, 29, 'v4')
-
-        data['color'] = 'grey'  # Set default color to grey
-
-        # Update color based on conditions
-        data.loc[(data['v4'] < data['v3']) & (data['v3'] < data['v2']) & (data['v2'] < data['v1']), 'color'] = 'gold'
-        data.loc[(data['v1'] < data['v2']) & (data['v2'] < data['v3']) & (data['v3'] < data['v4']), 'color'] = 'blue'
+        # Apply SMMA to the dataframe and color the line
+        data = add_goldhand_line(data)
 
         # Identify rows where color changes compared to the previous row
         data['color_change'] = data['color'] != data['color'].shift(1)
@@ -20,98 +20,19 @@ def goldhand_line_strategy(data, buy_at='gold', sell_at='grey'):
     Returns: The trades of the GoldHandLine strategy. 
     """
 
-    data['hl2'] = (data['high'] + data['low'])/2
-
-    def smma(data, window, colname):
-        hl2 = data['hl2'].values
-        smma_values = [hl2[0]]
-
-        for i in range(1, len(hl2)):
-            smma_val = (smma_values[-1] * (window - 1) + hl2[i]) / window
-            smma_values.append(smma_val)
-
-        data[colname] = smma_values
-        return data
-
-    # Apply SMMA to the dataframe
-    data = smma(data, 15, 'v1')
-    data = smma(data, 19, 'v2')
-    data = smma(data, 25, 'v3')
-    data = smma(data, 29, 'v4')
-
-    data['color'] = 'grey'  # Set default color to grey
-
-    # Update color based on conditions
-    data.loc[(data['v4'] < data['v3']) & (data['v3'] < data['v2']) & (data['v2'] < data['v1']), 'color'] = 'gold'
-    data.loc[(data['v1'] < data['v2']) & (data['v2'] < data['v3']) & (data['v3'] < data['v4']), 'color'] = 'blue'
-
-    in_trade = False  # Flag to track if already in a trade
-    trade_id = 1
-    all_trades = []
-
-    temp_trade = {}
-
-    for i in range(1, len(data)):
-        # Check if not already in a trade
-        if not in_trade:
-            # Generate buy signal
-            if (data['color'][i] ==buy_at) :
-
-                if i == (len(data) -1): 
-                    temp_trade['buy_price'] = data['close'][i]
-                    temp_trade.update(dict(data.iloc[i].add_prefix('buy_')))
-                else:
-                    temp_trade['buy_price'] = data['open'][i+1]
-                    temp_trade.update(dict(data.iloc[i+1].add_prefix('buy_')))
-                
-                
-                temp_trade['trade_id'] = trade_id
-                temp_trade['status'] = 'open'
-                in_trade = True  # Set flag to indicate in a trade
-        else:
-            # Generate sell signal
-            if (data['color'][i] ==sell_at) :
-
-                if i == (len(data) -1): 
-                    temp_trade['sell_price'] = data['close'][i]
-                    temp_trade.update(dict(data.iloc[i].add_prefix('sell_')))
-                else:
-                    temp_trade['sell_price'] = data['open'][i+1]
-                    temp_trade.update(dict(data.iloc[i+1].add_prefix('sell_')))
-                
-                temp_trade['trade_id'] = trade_id
-                temp_trade['status'] = 'closed'
-
-                # calculate results
-                temp_trade['result'] = temp_trade['sell_price'] / temp_trade['buy_price']
-                temp_trade['days_in_trade'] = (temp_trade['sell_date'] - temp_trade['buy_date']).days
-
-
-
-                in_trade = False  # Reset flag to indicate not in a trade
-                trade_id +=1
-                all_trades.append(temp_trade)
-                temp_trade = {}
-    if temp_trade:
-        temp_trade['sell_price'] = data['close'][i]
-        temp_trade['trade_id'] = trade_id
-        temp_trade['sell_date'] = data['date'][i]
+    # Apply SMMA to the dataframe and color the line, unless it is already computed e.g. on the full history
+    if 'color' not in data.columns:
+        data = add_goldhand_line(data)
 
-        temp_trade['result'] = temp_trade['sell_price'] / temp_trade['buy_price']
-        temp_trade['days_in_trade'] = (temp_trade['sell_date'] - temp_trade['buy_date']).days
-        all_trades.append(temp_trade)
+    buy, sell = goldhand_line_signals(data, buy_at, sell_at)
+    return signals_to_trades(data, buy, sell)
 
-    res_df = pd.DataFrame(all_trades)
-    # change orders
 
-    all_col = res_df.columns.tolist()
-    first = ['result', 'buy_price', 'sell_price', 'buy_date', 'sell_date', 'days_in_trade']
-    first.extend([x for x in all_col if x not in first])
-    res_df = res_df[first]
-    return(res_df)
+# signal form of the strategy, for backtest_strategies
+goldhand_line_strategy.signals = goldhand_line_signals
 
 
-def show_indicator_goldhand_line_strategy(ticker, plot_title = '', buy_at='gold', sell_at='grey', ndays=0, plot_height=1000, add_strategy_summary = True):
+def show_indicator_goldhand_line_strategy(ticker, plot_title = '', buy_at='gold', sell_at='grey', ndays=0, plot_height=1000, add_strategy_summary = True, provider=None, date_type='datetime64'):
     """
     This function shows the GoldHandLine strategy on a plotly chart including the price,  trades, strategy summary and GoldHandLine indicator.
        
@@ -123,37 +44,17 @@ def show_indicator_goldhand_line_strategy(ticker, plot_title = '', buy_at='gold'
     - ndays (int): The number of days to show. If 0, all data will be shown.
     - plot_height (int): The height of the plot.
     - add_strategy_summary (bool): If True, the strategy summary will be added to the plot.
+    - provider (DataProvider): The source of the price data. Default is None, yfinance.
+    - date_type (str): The type of the date column, 'datetime64' or 'date' for datetime.date objects. Default is 'datetime64'.
     
     Returns: The plot including the price,  trades, strategy summary and GoldHandLine indicator.
     """
 
-    data = GoldHand(ticker).df
+    data = GoldHand(ticker, provider=provider, date_type=date_type).df
 
     #### data prepar
-    data['hl2'] = (data['high'] + data['low'])/2
-
-    def smma(data, window, colname):
-        hl2 = data['hl2'].values
-        smma_values = [hl2[0]]
-
-        for i in range(1, len(hl2)):
-            smma_val = (smma_values[-1] * (window - 1) + hl2[i]) / window
-            smma_values.append(smma_val)
-
-        data[colname] = smma_values
-        return data
-
-    # Apply SMMA to the dataframe
-    data = smma(data, 15, 'v1')
-    data = smma(data, 19, 'v2')
-    data = smma(data, 25, 'v3')
-    data = smma(data, 29, 'v4')
-
-    data['color'] = 'grey'  # Set default color to grey
-
-    # Update color based on conditions
-    data.loc[(data['v4'] < data['v3']) & (data['v3'] < data['v2']) & (data['v2'] < data['v1']), 'color'] = 'gold'
-    data.loc[(data['v1'] < data['v2']) & (data['v2'] < data['v3']) & (data['v3'] < data['v4']), 'color'] = 'blue'
+    # Apply SMMA to the dataframe and color the line
+    data = add_goldhand_line(data)
 
 
 
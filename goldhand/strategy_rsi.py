@@ -18,74 +18,15 @@ def rsi_strategy(data, buy_threshold = 30, sell_threshold = 70):
     - sell_threshold: int, default 70, sell when RSI is above this value
     """
 
-    in_trade = False  # Flag to track if already in a trade
-    trade_id = 1
-    all_trades = []
-
-    temp_trade = {}
-
-    for i in range(1, len(data)):
-        # Check if not already in a trade
-        if not in_trade:
-            # Generate buy signal
-            #You have to change olne the buy and sell signal
-            if data['rsi'][i] < buy_threshold:
-
-                if i == (len(data) -1): 
-                    temp_trade['buy_price'] = data['close'][i]
-                    temp_trade.update(dict(data.iloc[i].add_prefix('buy_')))
-                else:
-                    temp_trade['buy_price'] = data['open'][i+1]
-                    temp_trade.update(dict(data.iloc[i+1].add_prefix('buy_')))
-
-                temp_trade['trade_id'] = trade_id
-                temp_trade['status'] = 'open'
-                in_trade = True  # Set flag to indicate in a trade
-        else:
-            # Generate sell signal
-            #You have to change olne the buy and sell signal
-            if data['rsi'][i] > sell_threshold:
-                if i == (len(data) -1): 
-                    temp_trade['sell_price'] = data['close'][i]
-                    temp_trade.update(dict(data.iloc[i].add_prefix('sell_')))
-                else:
-                    temp_trade['sell_price'] = data['open'][i+1]
-                    temp_trade.update(dict(data.iloc[i+1].add_prefix('sell_')))
-                                       
-                temp_trade['trade_id'] = trade_id
-                temp_trade['status'] = 'closed'
-
-                
-                # calculate results
-                temp_trade['result'] = temp_trade['sell_price'] / temp_trade['buy_price']
-                temp_trade['days_in_trade'] = (temp_trade['sell_date'] - temp_trade['buy_date']).days
-
-                in_trade = False  # Reset flag to indicate not in a trade
-                trade_id +=1
-                all_trades.append(temp_trade)
-                temp_trade = {}
-                
-    if temp_trade:
-        temp_trade['sell_price'] = data['close'][i]
-        temp_trade['trade_id'] = trade_id
-        temp_trade['sell_date'] = data['date'][i]
-
-        temp_trade['result'] = temp_trade['sell_price'] / temp_trade['buy_price']
-        temp_trade['days_in_trade'] = (temp_trade['sell_date'] - temp_trade['buy_date']).days
-        all_trades.append(temp_trade)
-
-    res_df = pd.DataFrame(all_trades)
-    
-    # change orders
-    all_col = res_df.columns.tolist()
-    first = ['result', 'buy_price', 'sell_price', 'buy_date', 'sell_date', 'days_in_trade']
-    first.extend([x for x in all_col if x not in first])
-    res_df = res_df[first]
-    return(res_df)
+    buy, sell = rsi_signals(data, buy_threshold, sell_threshold)
+    return signals_to_trades(data, buy, sell)
+
 
+# signal form of the strategy, for backtest_strategies
+rsi_strategy.signals = rsi_signals
 
 
-def show_indicator_rsi_strategy(ticker, buy_threshold = 30, sell_threshold = 70, plot_title = '', ndays=0, plot_height=1000, add_strategy_summary = True):
+def show_indicator_rsi_strategy(ticker, buy_threshold = 30, sell_threshold = 70, plot_title = '', ndays=0, plot_height=1000, add_strategy_summary = True, provider=None, date_type='datetime64'):
     """
     Show RSI strategy result in one plot: candlestick chart, SMA lines, trades, RSI indicator, summary of the strategy on the left side of the plot
     Parameters:
@@ -96,9 +37,11 @@ def show_indicator_rsi_strategy(ticker, buy_threshold = 30, sell_threshold = 70,
     - ndays: int, default 0, number of days to show, if 0, show all data
     - plot_height: int, default 1000, height of the plot
     - add_strategy_summary: bool, default True, add strategy summary to the plot
+    - provider: DataProvider, default None, source of the price data, None for yfinance
+    - date_type: str, default 'datetime64', type of the date column, 'date' for datetime.date objects
     """
 
-    tdf = GoldHand(ticker).df
+    tdf = GoldHand(ticker, provider=provider, date_type=date_type).df
     backtest = Backtest( tdf, rsi_strategy, buy_threshold=buy_threshold, sell_threshold=sell_threshold)
     trades =backtest.trades
     
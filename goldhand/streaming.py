@@ -0,0 +1,290 @@
+from collections import deque
+import numpy as np
+from goldhand.indicators import smma_multi
+
+
+class RollingSum:
+    def __init__(self, window):
+        """
+        Sum of the last window values with compensated (Kahan) summation to avoid drift on long streams
+
+        Parameters:
+        - window: int, number of values in the sum
+        """
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def _add(self, x):
+        y = x - self.compensation
+        t = self.total + y
+        self.compensation = (t - self.total) - y
+        self.total = t
+
+    def update(self, x):
+        """
+        Add a new value and drop the oldest one when the window is full
+        Parameters:
+        - x: float, new value
+        Return: float, sum of the window
+        """
+        self.values.append(x)
+        self._add(x)
+        if len(self.values) > self.window:
+            self._add(-self.values.popleft())
+        return self.total
+
+    @property
+    def full(self):
+        return len(self.values) == self.window
+
+
+class SmmaState:
+    def __init__(self, window):
+        """
+        Streaming Smoothed Simple Moving Average (SMMA), same values as indicators.smma
+
+        Parameters:
+        - window: int, window size
+        """
+        self.window = window
+        self.value = np.nan
+
+    def seed(self, values):
+        """
+        Initialize the state from the history
+        Parameters:
+        - values: array like, history of the input, e.g. hl2
+        Return: self
+        """
+        if len(values):
+            self.value = smma_multi(values, [self.window])[-1, 0]
+        return self
+
+    def update(self, x):
+        """
+        Parameters:
+        - x: float, new value
+        Return: float, SMMA of the new bar
+        """
+        if np.isnan(self.value):
+            self.value = float(x)
+        else:
+            self.value = (self.value * (self.window - 1) + x) / self.window
+        return self.value
+
+
+class SmaState:
+    def __init__(self, window):
+        """
+        Streaming Simple Moving Average, same values as Series.rolling(window).mean()
+
+        Parameters:
+        - window: int, window size
+        """
+        self.window = window
+        self.sum = RollingSum(window)
+        self.value = np.nan
+
+    def seed(self, values):
+        """
+        Initialize the state from the history
+        Parameters:
+        - values: array like, history of the input
+        Return: self
+        """
+        for x in np.asarray(values, dtype=np.float64)[-self.window:]:
+            self.update(x)
+        return self
+
+    def update(self, x):
+        """
+        Parameters:
+        - x: float, new value
+        Return: float, SMA of the new bar, NaN until the window is full
+        """
+        total = self.sum.update(x)
+        self.value = total / self.window if self.sum.full else np.nan
+        return self.value
+
+
+class BollingerState:
+    def __init__(self, window=20, n_std=2):
+        """
+        Streaming Bollinger bands with the sample standard deviation, same values as the rolling mean and std
+
+        Parameters:
+        - window: int, window size
+        - n_std: float, width of the bands in standard deviations
+        """
+        self.window = window
+        self.n_std = n_std
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.mid = self.upper = self.lower = np.nan
+
+    def seed(self, values):
+        """
+        Initialize the state from the history
+        Parameters:
+        - values: array like, history of the close prices
+        Return: self
+        """
+        for x in np.asarray(values, dtype=np.float64)[-self.window:]:
+            self.update(x)
+        return self
+
+    def update(self, x):
+        """
+        Parameters:
+        - x: float, new close price
+        Return: tuple of floats, (mid, upper, lower), NaN until the window is full
+        """
+        # Welford add and remove steps
+        self.values.append(x)
+        delta = x - self.mean
+        self.mean += delta / len(self.values)
+        self.m2 += delta * (x - self.mean)
+        if len(self.values) > self.window:
+            y = self.values.popleft()
+            delta = y - self.mean
+            self.mean -= delta / len(self.values)
+            self.m2 -= delta * (y - self.mean)
+
+        if len(self.values) < self.window:
+            return self.mid, self.upper, self.lower
+        std = np.sqrt(max(self.m2, 0.0) / (self.window - 1))
+        self.mid = self.mean
+        self.upper = self.mean + self.n_std * std
+        self.lower = self.mean - self.n_std * std
+        return self.mid, self.upper, self.lower
+
+
+class RsiState:
+    def __init__(self, window=14, wilder=True):
+        """
+        Streaming Relative Strength Index
+
+        Parameters:
+        - window: int, window size
+        - wilder: bool, Wilder smoothing like helpers.get_olhc_data, False for the rolling mean RSI of GoldHand
+        """
+        self.window = window
+        self.wilder = wilder
+        self.prev_close = None
+        self.count = 0
+        self.value = np.nan
+        # Wilder smoothing, the same as pandas ewm(alpha=1/window, adjust=True)
+        self.gain_num = self.loss_num = self.weight = 0.0
+        # rolling mean version
+        self.gains = RollingSum(window)
+        self.losses = RollingSum(window)
+
+    def seed(self, values):
+        """
+        Initialize the state from the history
+        Parameters:
+        - values: array like, history of the close prices
+        Return: self
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if not self.wilder:
+            # the rolling mean only needs the last window changes
+            values = values[-(self.window + 1):]
+        for x in values:
+            self.update(x)
+        return self
+
+    def update(self, x):
+        """
+        Parameters:
+        - x: float, new close price
+        Return: float, RSI of the new bar, NaN until enough bars
+        """
+        if self.prev_close is None:
+            self.prev_close = x
+            return self.value
+        delta = x - self.prev_close
+        self.prev_close = x
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        self.count += 1
+
+        if self.wilder:
+            decay = 1 - 1 / self.window
+            self.gain_num = self.gain_num * decay + gain
+            self.loss_num = self.loss_num * decay + loss
+            self.weight = self.weight * decay + 1
+            avg_gain, avg_loss = self.gain_num / self.weight, self.loss_num / self.weight
+        else:
+            avg_gain = self.gains.update(gain) / self.window
+            avg_loss = self.losses.update(loss) / self.window
+
+        if self.count < self.window:
+            return self.value
+        self.value = 100 - 100 / (1 + np.float64(avg_gain) / avg_loss) if avg_loss != 0 or avg_gain != 0 else np.nan
+        return self.value
+
+
+class IndicatorStream:
+    def __init__(self, wilder_rsi=False, sma_windows=(50, 100, 200), bb_window=20, line_windows=(15, 19, 25, 29)):
+        """
+        Streaming state of the GoldHand indicators, updated in constant time per new bar
+
+        Parameters:
+        - wilder_rsi: bool, Wilder RSI like helpers.get_olhc_data, False for the RSI of GoldHand
+        - sma_windows: tuple of int, SMA windows
+        - bb_window: int, Bollinger band window
+        - line_windows: tuple of 4 int, SMMA windows of the GoldHand line
+        """
+        self.rsi = RsiState(14, wilder=wilder_rsi)
+        self.smas = {x: SmaState(x) for x in sma_windows}
+        self.bollinger = BollingerState(bb_window)
+        self.lines = [SmmaState(x) for x in line_windows]
+
+    def seed(self, df):
+        """
+        Initialize the states from the history
+        Parameters:
+        - df: Pandas DataFrame with high, low and close columns
+        Return: self
+        """
+        close = df['close'].values
+        self.rsi.seed(close)
+        for state in self.smas.values():
+            state.seed(close)
+        self.bollinger.seed(close)
+        hl2 = ((df['high'] + df['low'])/2).values
+        for state in self.lines:
+            state.seed(hl2)
+        return self
+
+    def update(self, bar):
+        """
+        Add a new bar
+        Parameters:
+        - bar: dictionary or Pandas Series with high, low and close
+        Return: dictionary of the indicator values of the new bar with the GoldHand column names
+        """
+        close = bar['close']
+        hl2 = (bar['high'] + bar['low'])/2
+        row = {'hl2': hl2, 'rsi': self.rsi.update(close)}
+        for window, state in self.smas.items():
+            row[f'sma_{window}'] = state.update(close)
+        for window in self.smas:
+            row[f'diff_sma{window}'] = (close/row[f'sma_{window}'] -1)*100
+
+        mid, upper, lower = self.bollinger.update(close)
+        row.update({'bb_mid': mid, 'bb_upper': upper, 'bb_lower': lower,
+                    'diff_upper_bb': (upper/close -1)*100, 'diff_lower_bb': (lower/close -1)*100})
+
+        v1, v2, v3, v4 = [state.update(hl2) for state in self.lines]
+        row.update({'v1': v1, 'v2': v2, 'v3': v3, 'v4': v4})
+        if v4 < v3 < v2 < v1:
+            row['color'] = 'gold'
+        elif v1 < v2 < v3 < v4:
+            row['color'] = 'blue'
+        else:
+            row['color'] = 'grey'
+        return row
@@ -0,0 +1,136 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from goldhand.backtest import Backtest
+from goldhand.engine import uses_goldhand_line, with_goldhand_line
+from goldhand.providers import FrameProvider, YFinanceProvider
+from goldhand.stocks import GoldHand
+
+
+def parameter_grid(grid):
+    """
+    All the combinations of a parameter grid
+    Parameters:
+    - grid: dictionary of parameter name and list of values, e.g. {'buy_threshold': [20, 30], 'sell_threshold': [70, 80]}
+    Return: list of dictionaries, one per combination
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[x] for x in names])]
+
+
+def frame_sources(tickers, provider=None):
+    """
+    What is needed to build the data of every ticker in a worker process, so the parent never holds the whole universe
+    Parameters:
+    - tickers: list of str, DataFrame with a name column (e.g. Tw().get_top_n_stocks_by_sector()),
+               or dictionary of ticker and DataFrame with the indicators
+    - provider: DataProvider, source of the price data, default YFinanceProvider. An in-memory FrameProvider
+                is cut to one ticker per source, so a worker receives only the rows of its ticker
+    Return: dictionary of ticker and DataFrame or DataProvider
+    """
+    if isinstance(tickers, dict):
+        return dict(tickers)
+    if isinstance(tickers, pd.DataFrame):
+        tickers = tickers['name']
+    provider = YFinanceProvider() if provider is None else provider
+    if isinstance(provider, FrameProvider):
+        return {ticker: FrameProvider(provider.groups.get(ticker, pd.DataFrame(columns=provider.columns))) for ticker in tickers}
+    return {ticker: provider for ticker in tickers}
+
+
+def load_frame(ticker, source, strategy_function=None, range='18y', interval='1d'):
+    """
+    Data of one ticker with the GoldHand indicators, computed once for all the backtests of the ticker
+    Parameters:
+    - ticker: str, ticker symbol
+    - source: DataFrame with the indicators or DataProvider of the price data, see frame_sources
+    - strategy_function: strategy of the backtests, the GoldHand line is added for the GoldHand line strategy
+    - range: str, time range of the data
+    - interval: str, interval of the data
+    Return: pandas DataFrame or None when the ticker has no data, a DataFrame source is not changed
+    """
+    if isinstance(source, pd.DataFrame):
+        df = source
+    else:
+        prices = source.download(ticker, period=range, interval=interval)
+        if prices.empty:
+            return None
+        df = GoldHand(ticker, range=range, interval=interval, provider=FrameProvider(prices)).df
+    if df is None or df.empty:
+        return None
+    if strategy_function is not None and uses_goldhand_line(strategy_function):
+        # computed on a copy, the strategy reuses it for every parameter combination
+        df = with_goldhand_line(df)
+    return df
+
+
+def load_frames(tickers, provider=None, range='18y', interval='1d', strategy_function=None):
+    """
+    Data of many tickers with the GoldHand indicators in the current process
+    Parameters:
+    - tickers: list of str, DataFrame with a name column, or dictionary of ticker and DataFrame, see frame_sources
+    - provider: DataProvider, source of the price data, default YFinanceProvider
+    - range: str, time range of the data
+    - interval: str, interval of the data
+    - strategy_function: strategy of the backtests, see load_frame
+    Return: dictionary of ticker and DataFrame, the tickers without data are left out
+    """
+    frames = {ticker: load_frame(ticker, source, strategy_function, range, interval) for ticker, source in frame_sources(tickers, provider).items()}
+    return {ticker: df for ticker, df in frames.items() if df is not None}
+
+
+def sweep_data(data, strategy_function, combinations):
+    """
+    Backtest one DataFrame with every parameter combination
+    Parameters:
+    - data: pandas DataFrame with the indicators, e.g. GoldHand(ticker).df
+    - strategy_function: strategy of the Backtest class, e.g. rsi_strategy
+    - combinations: list of dictionaries of the strategy parameters
+    Return: list of the trades summaries
+    """
+    return [Backtest(data, strategy_function, **params).trades_summary for params in combinations]
+
+
+def sweep_ticker(ticker, source, strategy_function, combinations, range='18y', interval='1d'):
+    """
+    Build the data of one ticker and backtest it with every parameter combination, run in the worker processes
+    Parameters:
+    - ticker: str, ticker symbol
+    - source: DataFrame or DataProvider, see load_frame
+    - strategy_function: strategy of the Backtest class
+    - combinations: list of dictionaries of the strategy parameters
+    - range: str, time range of the data
+    - interval: str, interval of the data
+    Return: list of the trades summaries, empty when the ticker has no data
+    """
+    data = load_frame(ticker, source, strategy_function, range, interval)
+    return [] if data is None else sweep_data(data, strategy_function, combinations)
+
+
+def run_sweep(tickers, strategy_function, grid, max_workers=None, provider=None, range='18y', interval='1d'):
+    """
+    Backtest a strategy on many tickers with every combination of a parameter grid in a process pool.
+    The data and the indicators of a ticker are prepared once in its worker and reused for all the combinations,
+    only the summaries are sent back.
+
+    Parameters:
+    - tickers: list of str, DataFrame with a name column, or dictionary of ticker and DataFrame with the indicators, see frame_sources
+    - strategy_function: strategy of the Backtest class, e.g. rsi_strategy or goldhand_line_strategy
+    - grid: dictionary of parameter name and list of values, e.g. {'buy_at': ['gold'], 'sell_at': ['grey', 'blue']}
+    - max_workers: int, number of processes, 1 runs in the current process
+    - provider: DataProvider, source of the price data, default YFinanceProvider
+    - range: str, time range of the data
+    - interval: str, interval of the data
+    Return: pd.DataFrame, one row of the trades summary per ticker and parameter combination
+    """
+    combinations = parameter_grid(grid)
+    sources = frame_sources(tickers, provider)
+
+    if max_workers == 1:
+        results = [sweep_ticker(ticker, source, strategy_function, combinations, range, interval) for ticker, source in sources.items()]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(sweep_ticker, ticker, source, strategy_function, combinations, range, interval) for ticker, source in sources.items()]
+            results = [x.result() for x in futures]
+
+    return pd.DataFrame([summary for summaries in results for summary in summaries])
@@ -1,71 +1,600 @@
 
 from re import A
+import os
+from datetime import datetime, timedelta
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 import json
+import hashlib
+
+
+_session = None
+_session_lock = Lock()
+
+
+def get_session():
+    """
+    Shared HTTP session with a connection pool used by all TradingView scanner requests
+    Return: requests.Session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        return _session
+
+
+def compact_frame(df, category_ratio=0.5, float32=True):
+    """
+    Reduce the memory of a DataFrame with smaller dtypes
+    Parameters:
+    - df: Pandas DataFrame
+    - category_ratio: float, text columns with fewer unique values than this ratio of the rows become categoricals
+    - float32: bool, store float columns as float32 (about 7 significant digits)
+    Return: Pandas DataFrame with categorical, down-casted integer and float32 columns
+    """
+    df = df.copy()
+    for col in df.columns:
+        values = df[col]
+        if values.dtype == object:
+            try:
+                n_unique = values.nunique()
+            except TypeError:
+                # lists, e.g. crypto categories
+                continue
+            if n_unique <= category_ratio * len(values):
+                df[col] = values.astype('category')
+        elif pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            df[col] = pd.to_numeric(values, downcast='integer')
+        elif pd.api.types.is_float_dtype(values):
+            if values.notna().all() and (values == values.round()).all() and values.abs().max() < 2**31:
+                df[col] = pd.to_numeric(values, downcast='integer')
+            elif float32 and values.dtype == 'float64':
+                df[col] = values.astype('float32')
+    return df
+
+
+STOCK_COLUMNS = [
+    "logoid", "name", "close", "change", "change_abs", "Recommend.All", "volume", "Value.Traded",
+    "market_cap_basic", "price_earnings_ttm", "earnings_per_share_basic_ttm", "number_of_employees",
+    "sector", "High.3M", "Low.3M", "Perf.3M", "Perf.5Y", "High.1M", "Low.1M", "High.6M", "Low.6M", "Perf.6M",
+    "beta_1_year", "price_52_week_high", "price_52_week_low", "High.All", "Low.All", "BB.lower", "BB.upper",
+    "change|1M", "change_abs|1M", "change|1W", "change_abs|1W", "change|240", "country", "EMA50", "EMA100",
+    "EMA200", "MACD.macd", "MACD.signal", "Mom", "Perf.1M", "RSI7", "SMA50", "SMA100", "SMA200",
+    "Stoch.RSI.K", "Stoch.RSI.D", "Perf.W", "Perf.Y", "Perf.YTD", "industry", "Perf.All", "description",
+    "type", "subtype", "update_mode", "pricescale", "minmov", "fractional", "minmove2", "Mom[1]", "RSI7[1]",
+    "Rec.Stoch.RSI", "currency", "fundamental_currency_code"
+]
+
+CRYPTO_COLUMNS = [
+    "base_currency", "base_currency_desc", "base_currency_logoid", "update_mode", "type", "typespecs",
+    "exchange", "crypto_total_rank", "close", "pricescale", "minmov", "fractional", "minmove2", "currency",
+    "24h_close_change|5", "market_cap_calc", "fundamental_currency_code", "24h_vol_cmc",
+    "circulating_supply", "crypto_common_categories", "crypto_blockchain_ecosystems"
+]
+
+ETF_COLUMNS = [
+    "name", "description", "logoid", "update_mode", "type", "typespecs", "close", "pricescale", "minmov",
+    "fractional", "minmove2", "currency", "change", "Value.Traded", "relative_volume_10d_calc", "aum",
+    "fundamental_currency_code", "nav_total_return.5Y", "expense_ratio", "asset_class.tr", "focus.tr",
+    "nav_discount_premium", "category.tr", "brand.tr", "niche.tr"
+]
+
+
+class ScannerQuery:
+    def __init__(self, market, columns, sort_by=None, sort_order='desc', **fields):
+        """
+        Builder of TradingView scanner queries
+
+        Parameters:
+        - market: str, scanner market of the url and the query, e.g. 'america' or 'coin'
+        - columns: list of str, requested columns
+        - sort_by: str, column to sort by
+        - sort_order: str, 'asc' or 'desc'
+        - fields: other fields of the query, e.g. filter, filter2, options, symbols
+        """
+        self.market = market
+        self.columns = list(columns)
+        self.sort_by = sort_by
+        self.sort_order = sort_order
+        self.fields = fields
+
+    def copy(self):
+        """
+        Return: independent copy of the query
+        """
+        return ScannerQuery(self.market, self.columns, self.sort_by, self.sort_order, **json.loads(json.dumps(self.fields)))
+
+    def select(self, columns, required=()):
+        """
+        Request only the given columns
+        Parameters:
+        - columns: list of str, requested columns
+        - required: list of str, columns always kept
+        Return: new ScannerQuery
+        """
+        query = self.copy()
+        query.columns = list(dict.fromkeys([*required, *columns]))
+        return query
+
+    def add_columns(self, *columns):
+        """
+        Request additional columns
+        Parameters:
+        - columns: str, column names
+        Return: new ScannerQuery
+        """
+        query = self.copy()
+        query.columns = list(dict.fromkeys([*query.columns, *columns]))
+        return query
+
+    def where(self, left, operation, right):
+        """
+        Add a filter to the query
+        Parameters:
+        - left: str, column to filter
+        - operation: str, e.g. 'equal', 'greater', 'in_range'
+        - right: value or list of values
+        Return: new ScannerQuery
+        """
+        query = self.copy()
+        query.fields.setdefault('filter', []).append({'left': left, 'operation': operation, 'right': right})
+        return query
+
+    def sort(self, by, order='desc'):
+        """
+        Sort the result of the query
+        Parameters:
+        - by: str, column to sort by
+        - order: str, 'asc' or 'desc'
+        Return: new ScannerQuery
+        """
+        query = self.copy()
+        query.sort_by = by
+        query.sort_order = order
+        return query
+
+    def to_dict(self, start=None, end=None):
+        """
+        Parameters:
+        - start: int, first row of the requested range
+        - end: int, end of the requested range
+        Return: dictionary of the query
+        """
+        query = {'columns': self.columns, **self.fields, 'markets': [self.market]}
+        if self.sort_by is not None:
+            query['sort'] = {'sortBy': self.sort_by, 'sortOrder': self.sort_order}
+        if start is not None:
+            query['range'] = [start, end]
+        return query
+
+    def to_json(self, start=None, end=None):
+        """
+        Parameters:
+        - start: int, first row of the requested range
+        - end: int, end of the requested range
+        Return: JSON string of the query
+        """
+        return json.dumps(self.to_dict(start, end))
+
+
+def stock_query():
+    """
+    Default query of the stocks on AMEX, NASDAQ and NYSE sorted by market capitalization
+    Return: ScannerQuery
+    """
+    query = ScannerQuery('america', STOCK_COLUMNS, sort_by='market_cap_basic', sort_order='desc',
+                         options={'lang': 'en'}, symbols={'query': {'types': []}, 'tickers': []})
+    return (query
+            .where('type', 'in_range', ['stock', 'dr', 'fund'])
+            .where('subtype', 'in_range', ['common', 'foreign-issuer', '', 'etf', 'etf,odd', 'etf,otc', 'etf,cfd'])
+            .where('exchange', 'in_range', ['AMEX', 'NASDAQ', 'NYSE'])
+            .where('is_primary', 'equal', True)
+            .where('active_symbol', 'equal', True))
+
+
+def crypto_query():
+    """
+    Default query of the crypto currencies sorted by rank
+    Return: ScannerQuery
+    """
+    return ScannerQuery('coin', CRYPTO_COLUMNS, sort_by='crypto_total_rank', sort_order='asc',
+                        ignore_unknown_fields=False, options={'lang': 'en'})
+
+
+def etf_query():
+    """
+    Default query of the ETFs and ETNs sorted by assets under management
+    Return: ScannerQuery
+    """
+    has_typespec = lambda x: {'operation': {'operator': 'and', 'operands': [{'expression': {'left': 'typespecs', 'operation': 'has', 'right': [x]}}]}}
+    return ScannerQuery('america', ETF_COLUMNS, sort_by='aum', sort_order='desc',
+                        ignore_unknown_fields=False, options={'lang': 'en'}, price_conversion={'to_symbol': True},
+                        filter2={'operator': 'and', 'operands': [{'operation': {'operator': 'or', 'operands': [has_typespec('etn'), has_typespec('etf')]}}]})
+
+
+QUERIES = {'stock': stock_query, 'crypto': crypto_query, 'etf': etf_query}
+
+# columns the universes can not be built without
+REQUIRED_COLUMNS = {'stock': ['name'], 'crypto': ['base_currency', 'crypto_common_categories'], 'etf': ['name']}
 
 
 class Tw:
-    def __init__(self):
+    max_rows = {'stock': None, 'crypto': 300, 'etf': 3000}
+
+    def __init__(self, lazy=True, cache_dir='~/.goldhand/tw', ttl=timedelta(hours=1), session=None, timeout=30, page_size=1000, max_rows=None, compact=False, columns=None, extra_columns=None):
         """ 
         Get all stock, crypto and ETF data from TradingView
+
+        Parameters:
+        - lazy: bool, download each universe on first access instead of in the constructor
+        - cache_dir: str, folder of the on-disk snapshots, None to disable the snapshots
+        - ttl: timedelta, snapshots younger than this are used instead of downloading again
+        - session: requests.Session, HTTP session of the scanner requests, default is the shared pooled session
+        - timeout: float, timeout of one scanner request in seconds
+        - page_size: int, number of rows requested in one scanner request
+        - max_rows: dictionary, maximum number of rows per universe, None for the full universe, default {'stock': None, 'crypto': 300, 'etf': 3000}
+        - compact: bool, store the universes with categorical and down-casted columns to save memory
+        - columns: dictionary, requested columns per universe instead of the default ones, e.g. {'stock': ['name', 'sector', 'market_cap_basic']}
+        - extra_columns: dictionary, columns requested in addition per universe
         """
-        self.stock = pd.DataFrame()
-        self.crypto = pd.DataFrame()
-        self.etf = pd.DataFrame()
-        
-        self.get_all_stock()
-        self.get_all_crypto()
-        self.get_all_etf()
+        self.lazy = lazy
+        self.cache_dir = None if cache_dir is None else os.path.expanduser(cache_dir)
+        self.ttl = ttl
+        self.session = get_session() if session is None else session
+        self.timeout = timeout
+        self.page_size = page_size
+        self.max_rows = {**Tw.max_rows, **(max_rows or {})}
+        self.compact = compact
+        self.columns = columns or {}
+        self.extra_columns = extra_columns or {}
+        self.memory_report = {}
+        self._stock = None
+        self._crypto = None
+        self._etf = None
+        self._indexes = {}
+
+        if not lazy:
+            self.load_all()
+
+    def load_all(self):
+        """
+        Load all universes, the ones without a fresh snapshot are downloaded concurrently
+        """
+        getters = {'stock': self.get_all_stock, 'crypto': self.get_all_crypto, 'etf': self.get_all_etf}
+        missing = []
+        for universe, getter in getters.items():
+            if getattr(self, f"_{universe}") is None:
+                snapshot = self.read_snapshot(universe)
+                if snapshot is None:
+                    missing.append(getter)
+                else:
+                    setattr(self, universe, snapshot)
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(lambda getter: getter(), missing))
+
+    def scan(self, market, data_query):
+        """
+        Send a query to the TradingView scanner
+        Parameters:
+        - market: str, scanner market, e.g. 'america' or 'coin'
+        - data_query: str, JSON query
+        Return: dictionary of the response
+        """
+        response = self.session.post(f'https://scanner.tradingview.com/{market}/scan', data=data_query, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def query(self, universe, columns=None, extra_columns=None):
+        """
+        Scanner query of a universe with the requested columns
+        Parameters:
+        - universe: str, 'stock', 'crypto' or 'etf'
+        - columns: list of str, requested columns, None for the columns set in the constructor or the default ones
+        - extra_columns: list of str, additional columns, None for the ones set in the constructor
+        Return: ScannerQuery
+        """
+        columns = self.columns.get(universe) if columns is None else columns
+        extra_columns = self.extra_columns.get(universe, []) if extra_columns is None else extra_columns
+        query = QUERIES[universe]()
+        if columns is not None:
+            query = query.select(columns, required=REQUIRED_COLUMNS[universe])
+        return query.add_columns(*extra_columns)
 
-    def get_all_stock(self):
+    def scan_pages(self, query, max_rows=None):
+        """
+        Send a query to the TradingView scanner page by page, the range of the query is set for every page
+        Parameters:
+        - query: ScannerQuery
+        - max_rows: int, maximum number of rows, None for all rows
+        Return: generator of Pandas DataFrames with the requested columns and tradingview_id
+        """
+        start = 0
+        while max_rows is None or start < max_rows:
+            end = start + self.page_size if max_rows is None else min(start + self.page_size, max_rows)
+            data = self.scan(query.market, query.to_json(start, end))
+            rows = data.get('data') or []
+            if rows:
+                page = pd.DataFrame([x['d'] for x in rows], columns=query.columns)
+                page['tradingview_id'] = [x['s'] for x in rows]
+                yield page
+            if len(rows) < end - start:
+                break
+            start = end
+            if start >= data.get('totalCount', end + 1):
+                break
+
+    @staticmethod
+    def concat_pages(pages, columns=()):
+        """
+        Build one DataFrame from the pages of a scanner query
+        Parameters:
+        - pages: iterable of Pandas DataFrames
+        - columns: list of str, columns of the pages, e.g. query.columns, kept when the scan returns nothing
+        Return: Pandas DataFrame, with the columns and tradingview_id when there are no pages
+        """
+        pages = list(pages)
+        if not pages:
+            return pd.DataFrame(columns=[*columns, 'tradingview_id'])
+        return pd.concat(pages, ignore_index=True)
+
+    @property
+    def stock(self):
+        """
+        Stocks data, loaded on first access
+        """
+        if self._stock is None:
+            self._stock = self.read_snapshot('stock')
+            if self._stock is None:
+                self.get_all_stock()
+        return self._stock
+
+    @stock.setter
+    def stock(self, df):
+        self._stock = df
+
+    @property
+    def crypto(self):
+        """
+        Crypto data, loaded on first access
+        """
+        if self._crypto is None:
+            self._crypto = self.read_snapshot('crypto')
+            if self._crypto is None:
+                self.get_all_crypto()
+        return self._crypto
+
+    @crypto.setter
+    def crypto(self, df):
+        self._crypto = df
+
+    @property
+    def etf(self):
+        """
+        ETF data, loaded on first access
+        """
+        if self._etf is None:
+            self._etf = self.read_snapshot('etf')
+            if self._etf is None:
+                self.get_all_etf()
+        return self._etf
+
+    @etf.setter
+    def etf(self, df):
+        self._etf = df
+
+    def get_index(self, universe):
+        """
+        Ticker to row position index of a universe, built once per snapshot.
+        The sector and industry ranks of the stocks are built with it and kept next to the index, see get_ranks.
+        Parameters:
+        - universe: str, 'stock', 'crypto' or 'etf'
+        Return: dictionary, the first row wins for duplicated tickers
+        """
+        df = getattr(self, universe)
+        cached = self._indexes.get(universe)
+        if cached is not None and cached[0] is df:
+            return cached[1]
+
+        key = 'ticker' if universe == 'crypto' else 'name'
+        index = {name: i for i, name in reversed(list(enumerate(df[key])))}
+        ranks = self.rank_frame(df) if universe == 'stock' else None
+        self._indexes[universe] = (df, index, ranks)
+        return index
+
+    def get_ranks(self, universe='stock'):
+        """
+        Sector and industry ranks of a universe, the DataFrame of the universe is not changed
+        Parameters:
+        - universe: str, 'stock'
+        Return: Pandas DataFrame in the row order of the universe, see rank_frame
+        """
+        self.get_index(universe)
+        return self._indexes[universe][2]
+
+    @staticmethod
+    def rank_frame(df):
+        """
+        Location of every stock inside its sector and industry in the order of the DataFrame (market cap)
+        Parameters:
+        - df: Pandas DataFrame of stocks
+        Return: Pandas DataFrame with the index of df and sec_rank, sec_count, ind_rank and ind_count columns
+        """
+        ranks = pd.DataFrame(index=df.index)
+        for col, prefix in (('sector', 'sec'), ('industry', 'ind')):
+            if col not in df.columns:
+                continue
+            groups = df.groupby(col, sort=False, observed=True)
+            ranks[f'{prefix}_rank'] = groups.cumcount() + 1
+            ranks[f'{prefix}_count'] = groups[col].transform('size')
+        return ranks
+
+    def compact_universe(self, universe, df):
+        """
+        Compact the DataFrame of a universe in compact mode and record its memory footprint
+        Parameters:
+        - universe: str, 'stock', 'crypto' or 'etf'
+        - df: Pandas DataFrame
+        Return: Pandas DataFrame
+        """
+        if not self.compact or df is None:
+            return df
+        before = df.memory_usage(deep=True).sum()
+        df = compact_frame(df)
+        self.memory_report[universe] = {'before': before, 'after': df.memory_usage(deep=True).sum()}
+        return df
+
+    def memory_usage(self):
+        """
+        Memory footprint of the loaded universes
+        Return: Pandas DataFrame with the rows, columns, memory and the memory before compacting in MB
+        """
+        report = []
+        for universe in ['stock', 'crypto', 'etf']:
+            df = getattr(self, f"_{universe}")
+            if df is None:
+                continue
+            before = self.memory_report.get(universe, {}).get('before')
+            report.append({'universe': universe, 'rows': df.shape[0], 'columns': df.shape[1],
+                           'memory_mb': round(df.memory_usage(deep=True).sum() / 2**20, 2),
+                           'before_compact_mb': None if before is None else round(before / 2**20, 2)})
+        return pd.DataFrame(report)
+
+    def snapshot_path(self, universe, query=None):
+        """
+        Path of the on-disk snapshot of a universe, every query has its own snapshot
+        Parameters:
+        - universe: str, 'stock', 'crypto' or 'etf'
+        - query: ScannerQuery, default is the query of the universe with the columns set in the constructor
+        Return: str or None if the snapshots are disabled
+        """
+        if self.cache_dir is None:
+            return None
+        query = self.query(universe) if query is None else query
+        key = hashlib.md5(f"{query.to_json()}{self.max_rows[universe]}".encode()).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"{universe}_{key}.pkl")
+
+    def read_snapshot(self, universe):
+        """
+        Read the snapshot of a universe if it is younger than the ttl
+        Parameters:
+        - universe: str, 'stock', 'crypto' or 'etf'
+        Return: Pandas DataFrame or None
+        """
+        path = self.snapshot_path(universe)
+        if path is None or not os.path.exists(path):
+            return None
+        age = datetime.now() - datetime.fromtimestamp(os.path.getmtime(path))
+        if self.ttl is not None and age > self.ttl:
+            return None
+        try:
+            return self.compact_universe(universe, pd.read_pickle(path))
+        except Exception:
+            return None
+
+    def write_snapshot(self, universe, df, query=None):
+        """
+        Write the snapshot of a universe to disk
+        Parameters:
+        - universe: str, 'stock', 'crypto' or 'etf'
+        - df: Pandas DataFrame
+        - query: ScannerQuery the data was downloaded with
+        """
+        path = self.snapshot_path(universe, query)
+        if path is None:
+            return
+        # write to a temporary file first so parallel workers never read half written snapshots
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            df.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # e.g. read-only home folder, the data stays in memory only
+            print(f"Could not write the {universe} snapshot: {e}")
+
+    def iter_stock_pages(self, columns=None, extra_columns=None):
         """ 
-        Get all stocks data from TradingView
+        Get the stocks from TradingView page by page as they arrive
+        Parameters:
+        - columns: list of str, requested columns, None for the default ones
+        - extra_columns: list of str, additional columns
+        Return: generator of Pandas DataFrames
         """
-        data_query = '{"filter":[{"left":"type","operation":"in_range","right":["stock","dr","fund"]},{"left":"subtype","operation":"in_range","right":["common","foreign-issuer","","etf","etf,odd","etf,otc","etf,cfd"]},{"left":"exchange","operation":"in_range","right":["AMEX","NASDAQ","NYSE"]},{"left":"is_primary","operation":"equal","right":true},{"left":"active_symbol","operation":"equal","right":true}],"options":{"lang":"en"},"markets":["america"],"symbols":{"query":{"types":[]},"tickers":[]},"columns":["logoid","name","close","change","change_abs","Recommend.All","volume","Value.Traded","market_cap_basic","price_earnings_ttm","earnings_per_share_basic_ttm","number_of_employees","sector","High.3M","Low.3M","Perf.3M","Perf.5Y","High.1M","Low.1M","High.6M","Low.6M","Perf.6M","beta_1_year","price_52_week_high","price_52_week_low","High.All","Low.All","BB.lower","BB.upper","change|1M","change_abs|1M","change|1W","change_abs|1W","change|240","country","EMA50","EMA100","EMA200","MACD.macd","MACD.signal","Mom","Perf.1M","RSI7","SMA50","SMA100","SMA200","Stoch.RSI.K","Stoch.RSI.D","Perf.W","Perf.Y","Perf.YTD","industry","Perf.All","description","type","subtype","update_mode","pricescale","minmov","fractional","minmove2","Mom[1]","RSI7[1]","Rec.Stoch.RSI","currency","fundamental_currency_code"],"sort":{"sortBy":"market_cap_basic","sortOrder":"desc"},"range":[0,8000]}'
-        response = requests.post('https://scanner.tradingview.com/america/scan', data=data_query)
-        data = response.json()
-        list_elements = [x['d'] for x in data['data']]
-        columns = json.loads(data_query)['columns']
-        self.stock = pd.DataFrame(list_elements, columns=columns)
-        self.stock['tradingview_id'] = [x['s'] for x in data['data']]
-        self.stock = self.stock[self.stock['name'].str.contains('\\.')!=True]
-        self.stock.reset_index(inplace=True, drop=True)
+        query = self.query('stock', columns, extra_columns)
+        for page in self.scan_pages(query, self.max_rows['stock']):
+            yield page[page['name'].str.contains('\\.')!=True]
 
+    def get_all_stock(self, columns=None, extra_columns=None):
+        """ 
+        Get all stocks data from TradingView
+        Parameters:
+        - columns: list of str, requested columns, None for the default ones
+        - extra_columns: list of str, additional columns
+        """
+        query = self.query('stock', columns, extra_columns)
+        df = self.concat_pages(self.iter_stock_pages(columns, extra_columns), query.columns)
+        # the snapshot keeps the downloaded dtypes, it is compacted after reading in compact mode
+        self.write_snapshot('stock', df, query)
+        self.stock = self.compact_universe('stock', df)
 
+    def iter_crypto_pages(self, columns=None, extra_columns=None):
+        """
+        Get the crypto data from TradingView page by page as they arrive
+        Parameters:
+        - columns: list of str, requested columns, None for the default ones
+        - extra_columns: list of str, additional columns
+        Return: generator of Pandas DataFrames
+        """
+        query = self.query('crypto', columns, extra_columns)
+        for page in self.scan_pages(query, self.max_rows['crypto']):
+            filter = list(map(lambda x: 'stablecoins' not in x, page['crypto_common_categories'].fillna('-') ))
+            page = page.loc[filter, ].copy()
+            page['ticker'] = page['base_currency'] + '-USD'
+            yield page
 
-    def get_all_crypto(self):
+    def get_all_crypto(self, columns=None, extra_columns=None):
         """
         Get all crypto data from TradingView       
+        Parameters:
+        - columns: list of str, requested columns, None for the default ones
+        - extra_columns: list of str, additional columns
         """
+        query = self.query('crypto', columns, extra_columns)
+        df = self.concat_pages(self.iter_crypto_pages(columns, extra_columns), [*query.columns, 'ticker'])
+        self.write_snapshot('crypto', df, query)
+        self.crypto = self.compact_universe('crypto', df)
 
-        data_query = '{"columns":["base_currency","base_currency_desc","base_currency_logoid","update_mode","type","typespecs","exchange","crypto_total_rank","close","pricescale","minmov","fractional","minmove2","currency","24h_close_change|5","market_cap_calc","fundamental_currency_code","24h_vol_cmc","circulating_supply","crypto_common_categories","crypto_blockchain_ecosystems"],"ignore_unknown_fields":false,"options":{"lang":"en"},"range":[0,300],"sort":{"sortBy":"crypto_total_rank","sortOrder":"asc"},"markets":["coin"]}'
-        response = requests.post('https://scanner.tradingview.com/coin/scan', data=data_query)
-        data = response.json()
-        list_elements = list(map(lambda x:x['d'], data['data'] ))
-        self.crypto = pd.DataFrame(list_elements)
-        self.crypto.columns = json.loads(data_query)['columns']
-        self.crypto["tradingview_id"] = [x['s'] for x in data['data']]
-        filter = list(map(lambda x: 'stablecoins' not in x, self.crypto['crypto_common_categories'].fillna('-') ))
-        self.crypto = self.crypto.loc[filter, ]
-        self.crypto['ticker'] = self.crypto['base_currency'] + '-USD'
-        self.crypto.reset_index(inplace=True, drop=True)
+    def iter_etf_pages(self, columns=None, extra_columns=None):
+        """
+        Get the ETFs from TradingView page by page as they arrive
+        Parameters:
+        - columns: list of str, requested columns, None for the default ones
+        - extra_columns: list of str, additional columns
+        Return: generator of Pandas DataFrames
+        """
+        query = self.query('etf', columns, extra_columns)
+        for page in self.scan_pages(query, self.max_rows['etf']):
+            yield page[page['name'].str.contains('\\.')!=True]
 
-    def get_all_etf(self):
+    def get_all_etf(self, columns=None, extra_columns=None):
         """
         Get all ETFs from TradingView
+        Parameters:
+        - columns: list of str, requested columns, None for the default ones
+        - extra_columns: list of str, additional columns
         """
-        data_query = '{"columns":["name","description","logoid","update_mode","type","typespecs","close","pricescale","minmov","fractional","minmove2","currency","change","Value.Traded","relative_volume_10d_calc","aum","fundamental_currency_code","nav_total_return.5Y","expense_ratio","asset_class.tr","focus.tr","nav_discount_premium","category.tr","brand.tr","niche.tr"],"ignore_unknown_fields":false,"options":{"lang":"en"},"price_conversion":{"to_symbol":true},"range":[0,3000],"sort":{"sortBy":"aum","sortOrder":"desc"},"markets":["america"],"filter2":{"operator":"and","operands":[{"operation":{"operator":"or","operands":[{"operation":{"operator":"and","operands":[{"expression":{"left":"typespecs","operation":"has","right":["etn"]}}]}},{"operation":{"operator":"and","operands":[{"expression":{"left":"typespecs","operation":"has","right":["etf"]}}]}}]}}]}}'
-        response = requests.post('https://scanner.tradingview.com/america/scan', data=data_query)
-        data = response.json()
-        list_elements = list(map(lambda x:x['d'], data['data'] ))
-        self.etf = pd.DataFrame(list_elements)
-        self.etf.columns = json.loads(data_query)['columns']
-        self.etf["tradingview_id"] = [x['s'] for x in data['data']]
-        self.etf = self.etf[self.etf['name'].str.contains('\\.')!=True]
-        self.etf.reset_index(inplace=True, drop=True)
+        query = self.query('etf', columns, extra_columns)
+        df = self.concat_pages(self.iter_etf_pages(columns, extra_columns), query.columns)
+        self.write_snapshot('etf', df, query)
+        self.etf = self.compact_universe('etf', df)
     
 
     
@@ -77,6 +606,8 @@ class Tw:
         Return: string with unit
         """
 
+        # float32 values of compact mode would be printed with all their digits
+        money = float(money)
         if money > 1_000_000_000_000:
             money_str = f"{round(money / 1_000_000_000_000, 2)} Trillion" 
         elif money>1_000_000_000:
@@ -95,20 +626,20 @@ class Tw:
         """
 
         ticker = ticker.upper()
-        one_row = self.stock.loc[self.stock['name']==ticker,].iloc[0]
-        tsec = self.stock.loc[self.stock['sector']==one_row['sector']].reset_index(drop=True)
-        tind = self.stock.loc[self.stock['industry']== one_row['industry']].reset_index(drop=True)
+        position = self.get_index('stock')[ticker]
+        one_row = self.stock.iloc[position]
+        ranks = self.get_ranks('stock').iloc[position]
         return({'ticker': one_row['name'],
-                'price': one_row['close'],
-                'market_cap': one_row['market_cap_basic'] ,
-                'n_emp': one_row['number_of_employees'],
+                'price': float(one_row['close']),
+                'market_cap': float(one_row['market_cap_basic']) ,
+                'n_emp': float(one_row['number_of_employees']),
                 'market_cap_text': self.moneystring(one_row['market_cap_basic']),
                 'name': one_row['description'],
                 'sector': one_row['sector'],
                 'industry': one_row['industry'],
-                'sec_loc': f"{tsec.index[tsec['name']==ticker].to_list()[0] +1  }/{tsec.shape[0]}",
-                'ind_loc': f"{tind.index[tind['name']==ticker].to_list()[0] +1 }/{tind.shape[0]}",
-                'performance': f"Performance|week:{round(one_row['Perf.W'], 2)}% | month:{round(one_row['Perf.1M'], 2)}% | 6 months:{round(one_row['Perf.6M'], 2)}% | year:{round(one_row['Perf.Y'], 2)}% |"
+                'sec_loc': f"{int(ranks['sec_rank'])}/{int(ranks['sec_count'])}",
+                'ind_loc': f"{int(ranks['ind_rank'])}/{int(ranks['ind_count'])}",
+                'performance': f"Performance|week:{round(float(one_row['Perf.W']), 2)}% | month:{round(float(one_row['Perf.1M']), 2)}% | 6 months:{round(float(one_row['Perf.6M']), 2)}% | year:{round(float(one_row['Perf.Y']), 2)}% |"
                 })
         
         
@@ -121,7 +652,7 @@ class Tw:
         """
 
         return ( 
-                self.stock.groupby('sector')
+                self.stock.groupby('sector', observed=True)
                  .apply(lambda x: x.nlargest(int(len(x) * round((percent/100),2) ), 'market_cap_basic'))
                  .reset_index(drop=True)
                 
@@ -138,17 +669,17 @@ class Tw:
         try:
             if '-USD' in ticker:
                 # crypto
-                coin = self.crypto.loc[self.crypto['ticker']==ticker].iloc[0]
+                coin = self.crypto.iloc[self.get_index('crypto')[ticker]]
                 plotly_title = f"{coin['base_currency_desc']} ({coin['base_currency']})<br>💲{self.moneystring(coin['market_cap_calc'])} | {', '.join(coin['crypto_common_categories'])}"
             
-            elif ticker in self.etf['name'].tolist() :
+            elif ticker in self.get_index('etf'):
                 # ETF
-                t = self.etf.loc[self.etf['name']==ticker].iloc[0]
-                plotly_title = f"{t['description']} ({t['name']}) | 💲{round(t['close'], 2)} <br>AUM:💲{self.moneystring(t['aum'])} | {t['focus.tr']}  | Expense ratio {t['expense_ratio']}"
+                t = self.etf.iloc[self.get_index('etf')[ticker]]
+                plotly_title = f"{t['description']} ({t['name']}) | 💲{round(float(t['close']), 2)} <br>AUM:💲{self.moneystring(t['aum'])} | {t['focus.tr']}  | Expense ratio {round(float(t['expense_ratio']), 2)}"
             else:
                 # stock
                 t = self.get_one_stock_info(ticker)
-                plotly_title = f"{t['name']} ({t['ticker']}) | 💲{round(t['price'], 2)} | {t['sector']} | {t['industry']} <br>💲{t['market_cap_text']} | 👨‍💼 {round(t['n_emp']):,} <br>Sector location: {t['sec_loc']} | Industry location: {t['ind_loc']}"
+                plotly_title = f"{t['name']} ({t['ticker']}) | 💲{round(float(t['price']), 2)} | {t['sector']} | {t['industry']} <br>💲{t['market_cap_text']} | 👨‍💼 {round(float(t['n_emp'])):,} <br>Sector location: {t['sec_loc']} | Industry location: {t['ind_loc']}"
             return(plotly_title)
         except:
             return(f"{ticker}")
@@ -162,7 +693,7 @@ class Tw:
         Return: plotly figure showing the sector location of the stock
         """
 
-        if ticker in self.etf['name'].tolist():
+        if ticker in self.get_index('etf'):
             return f"{ticker} is ETF use get_etf_plot"
         row_df = self.stock.loc[self.stock['name']==ticker]
         row_df.rename(columns = {'description': 'Company'}, inplace=True)
@@ -183,7 +714,7 @@ class Tw:
         Return: plotly figure showing the industry location of the stock
         """
 
-        if ticker in self.etf['name'].tolist():
+        if ticker in self.get_index('etf'):
             return f"{ticker} is ETF use get_etf_plot"
         row_df = self.stock.loc[self.stock['name']==ticker]
         inddf = self.stock.loc[ (self.stock['industry'] ==row_df['industry'].iloc[0] ) ].reset_index(drop=True)